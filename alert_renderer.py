@@ -0,0 +1,890 @@
+# alert_renderer.py
+from typing import Dict, List, Optional
+from database import Trade
+from alert_manager import AlertEvent
+from config import ALERT_LOCALE
+
+# ========== TEMPLATES ==========
+# One template per alert type and locale. They are compiled once at import
+# (bound str.format_map) and only rendered when a message is delivered.
+
+TEMPLATES = {
+    'bn': {
+        'ENTRY_ZONE': """
+🎯 <b>{pair} এন্ট্রি জোনে!</b>
+
+💰 দাম: ${price}
+📊 জোন: ${entry_min} - ${entry_max}
+
+<b>🎯 টার্গেটস:</b>
+🥇 TP1: ${tp1}
+🥈 TP2: ${tp2}
+🥉 TP3: ${tp3}
+🛡️ SL: ${stop_loss}
+
+✅ এখনই ট্রেড খোলো!
+""",
+        'TP1_APPROACH': """
+🎯 <b>{pair} APPROACHING TP1!</b>
+
+💰 দাম: ${price}
+🥇 TP1: ${tp1}
+📊 প্রোগ্রেস: {progress:.1f}%
+
+<b>প্রস্তুতি নাও:</b>
+✅ ৩০% ক্লোজ করতে প্রস্তুত থাকো
+🛡️ SL BE তে মুভ করার জন্য রেডি
+""",
+        'TP2_APPROACH': """
+🎯 <b>{pair} APPROACHING TP2!</b>
+
+💰 দাম: ${price}
+🥈 TP2: ${tp2}
+📊 প্রোগ্রেস: {progress:.1f}%
+
+<b>অবস্থা:</b>
+✅ TP1: {tp1_closed}% ক্লোজড
+🛡️ SL: BE তে (${sl})
+""",
+        'TP3_APPROACH': """
+🎯 <b>{pair} APPROACHING TP3!</b>
+
+💰 দাম: ${price}
+🥉 TP3: ${tp3}
+📊 প্রোগ্রেস: {progress:.1f}%
+
+<b>অবস্থা:</b>
+✅ TP1: {tp1_closed}%
+✅ TP2: {tp2_closed}%
+🛡️ SL: TP1 তে (${sl})
+""",
+        'TP1_HIT': """
+🥇🥇🥇 <b>{pair} TP1 HIT!</b> 🥇🥇🥇
+
+💰 দাম: ${price}
+🎯 TP1: ${tp1}
+💵 প্রফিট: +{p1:.2f}%
+
+<b>📋 এখন করো:</b>
+1️⃣ <b>৩০% পজিশন বন্ধ করো</b> ✅
+2️⃣ প্রফিট বুক করো 💰
+3️⃣ SL মুভ করো → <b>BE</b> 🛡️
+
+<b>🎉 রিস্ক-ফ্রি ট্রেড!</b>
+""",
+        'AFTER_TP1': """
+📋 <b>TP1 পরের স্ট্র্যাটেজি:</b>
+
+<b>বর্তমান:</b>
+🥇 TP1: ✅ ডন (৩০% ক্লোজড)
+🛡️ SL: BE তে (${be:.4f})
+🥈 TP2: ${tp2}
+🥉 TP3: ${tp3}
+
+<b>পরবর্তী:</b>
+🎯 TP2 হিট → ৩০% ক্লোজ + SL → TP1
+🎯 TP3 হিট → ৪০% ক্লোজ + ফুল ক্লোজ
+🛑 SL হিট → ব্রেকইভেন (নো লস!)
+
+<b>✅ এখন আর লস হবে না!</b>
+""",
+        'TP2_HIT': """
+🥈🥈🥈 <b>{pair} TP2 HIT!</b> 🥈🥈🥈
+
+💰 দাম: ${price}
+🎯 TP2: ${tp2}
+💵 TP2 প্রফিট: +{p2:.2f}%
+
+<b>📋 এখন করো:</b>
+1️⃣ <b>আরও ৩০% বন্ধ করো</b> (মোট ৬০%) ✅
+2️⃣ SL ট্রেইল করো → <b>TP1</b> 🔒
+
+<b>লকড প্রফিট:</b>
+🥇 TP1: ৩০% @ ${tp1} (+{p1:.2f}%)
+🥈 TP2: ৩০% @ ${tp2} (+{p2:.2f}%)
+<b>মোট: ৬০% লকড! 💰💰</b>
+""",
+        'AFTER_TP2': """
+📋 <b>TP2 পরের স্ট্র্যাটেজি:</b>
+
+<b>বর্তমান:</b>
+🥇 TP1: ✅ ৩০% @ ${tp1}
+🥈 TP2: ✅ ৩০% @ ${tp2}
+🛡️ SL: TP1 তে (${tp1}) 🔒
+🥉 TP3: ${tp3} (বাকি ৪০%)
+
+<b>গ্যারান্টিড:</b>
+💰 <b>মিনিমাম ৬০% প্রফিট লকড!</b>
+🛡️ SL TP1 তে = TP1 প্রফিট সিকিউর!
+
+<b>ফাইনাল:</b>
+🎯 TP3 হিট → বাকি ৪০% ক্লোজ
+🎉 ফুল ট্রেড কমপ্লিট
+""",
+        'TP3_HIT': """
+🥉🥉🥉 <b>{pair} TP3 HIT!</b> 🥉🥉🥉
+🎉🎉🎉 <b>FINAL TARGET REACHED!</b> 🎉🎉🎉
+
+💰 দাম: ${price}
+🎯 TP3: ${tp3}
+💵 TP3 প্রফিট: +{p3:.2f}%
+
+<b>🏆 ALL TARGETS COMPLETE!</b>
+
+<b>📋 ফাইনাল একশন:</b>
+1️⃣ <b>বাকি ৪০% বন্ধ করো</b> ✅
+2️⃣ <b>ফুল পজিশন ক্লোজড!</b> 🎉
+
+<b>💰 ফাইনাল সামারি:</b>
+┌─────────────────────────┐
+│ 🥇 TP1: ৩০% × +{p1:.2f}%    │
+│ 🥈 TP2: ৩০% × +{p2:.2f}%    │
+│ 🥉 TP3: ৪০% × +{p3:.2f}%    │
+├─────────────────────────┤
+│ 📊 অ্যাভারেজ: +{avg_profit:.2f}%  │
+│ ✅ টোটাল: ১০০% ক্লোজড   │
+└─────────────────────────┘
+""",
+        'TRADE_COMPLETE': """
+🎊🎊🎊 <b>TRADE COMPLETE: {pair}</b> 🎊🎊🎊
+
+<b>সম্পূর্ণ সামারি:</b>
+পেয়ার: {pair}
+ডিরেকশন: {direction}
+এন্ট্রি: ${entry_avg:.4f}
+স্ট্যাটাস: ✅ <b>ALL TP HIT</b>
+
+<b>প্রফিট ডিস্ট্রিবিউশন:</b>
+🥇 TP1 (${tp1}): ৩০% ক্লোজড
+🥈 TP2 (${tp2}): ৩০% ক্লোজড
+🥉 TP3 (${tp3}): ৪০% ক্লোজড
+
+<b>রিস্ক ম্যানেজমেন্ট:</b>
+✅ SL BE তে মুভড
+✅ ট্রেইলিং SL ব্যবহারড
+✅ পারশিয়াল প্রফিট বুকড
+
+🎉 <b>পরবর্তী ট্রেডের জন্য প্রস্তুত!</b> 🎉
+""",
+        'TP2_MISSED': """
+😢 <b>{pair} TP2 MISSED!</b>
+
+💰 বর্তমান: ${price}
+🥈 TP2 ছিল: ${tp2}
+📉 দাম TP2 থেকে নিচে নেমে গেছে
+
+<b>অবস্থা:</b>
+✅ TP1: ৩০% ক্লোজড
+🛡️ SL: BE তে (${sl})
+❌ TP2: মিসড
+
+<b>কী করবে:</b>
+1️⃣ অপেক্ষা করো TP2 আবার হিট হতে
+2️⃣ বর্তমান দামে বাকি ক্লোজ করো
+3️⃣ SL BE তে = নো লস
+""",
+        'TP3_MISSED': """
+😢 <b>{pair} TP3 MISSED!</b>
+
+💰 বর্তমান: ${price}
+🥉 TP3 ছিল: ${tp3}
+📉 দাম TP3 থেকে নিচে নেমে গেছে
+
+<b>অবস্থা:</b>
+✅ TP1: ৩০% ক্লোজড
+✅ TP2: ৩০% ক্লোজড
+🛡️ SL: TP1 তে (${sl})
+❌ TP3: মিসড
+
+<b>কী করবে:</b>
+1️⃣ বর্তমান দামে বাকি ৪০% ক্লোজ করো
+2️⃣ অপেক্ষা করো আবার উপরে উঠতে
+3️⃣ ট্রেইলিং SL ব্যবহার করো
+
+<b>লকড:</b>
+💰 ৬০% ইতিমধ্যে লকড @ প্রফিট
+""",
+        'BE_MOVE': """
+⚪ <b>STOP LOSS MOVED TO BREAKEVEN!</b>
+
+🛡️ Old SL: ${old_sl}
+✅ New SL: ${sl}
+🎯 Entry: ${be:.4f}
+
+<b>🎉 RISK-FREE TRADE!</b>
+❌ এখন লস হবে না
+✅ শুধু প্রফিট বা ব্রেকইভেন
+💰 মিনিমাম ৩০% প্রফিট সিকিউরড
+""",
+        'TRAILING_SL': """
+🔒 <b>TRAILING SL UPDATED!</b>
+
+🛡️ Old SL: ${old_sl}
+✅ New SL: ${sl} ({new_level})
+💰 {new_level} প্রফিট লকড!
+
+<b>গ্যারান্টিড:</b>
+🥇 TP1 প্রফিট: লকড ✅
+{tp2_line}
+
+<b>বেনিফিট:</b>
+📉 দাম নিচে গেলেও {new_level} প্রফিট থাকবে
+🚀 উপরে গেলে আরও প্রফিট
+💯 রিস্ক ফ্রি!
+""",
+        'SL_HIT': """
+🛑 <b>{pair} STOP LOSS HIT!</b>
+
+💰 দাম: ${price}
+🛡️ SL: ${sl}
+📊 টাইপ: {sl_type}
+
+<b>রেজাল্ট:</b>
+{result}
+
+<b>ক্লোজড:</b>
+🥇 TP1: {tp1_closed}%
+🥈 TP2: {tp2_closed}%
+🥉 TP3: {tp3_closed}%
+
+<b>পরবর্তী ট্রেডের জন্য প্রস্তুত! 💪</b>
+""",
+        'CRITICAL_25': """
+🚨🚨🚨 <b>CRITICAL DANGER: {pair}</b> 🚨🚨🚨
+
+💰 বর্তমান: ${price}
+🛡️ SL: ${sl}
+📊 দূরত্ব: মাত্র {pct_to_sl:.1f}% বাকি!
+
+<b>⚡ তুরন্ত ক্লোজ করো!</b>
+❌ <b>এখনই বন্ধ করো!</b>
+📉 লস বড় হতে পারে
+🔥 লিকুইডেশন রিস্ক!
+
+<b>সময় নষ্ট করো না!</b>
+""",
+        'DANGER_50': """
+🚨 <b>DANGER ALERT: {pair}</b> 🚨
+
+💰 বর্তমান: ${price}
+🛡️ SL: ${sl}
+📊 SL এর {pct_to_sl:.1f}% দূরত্বে
+
+<b>⚠️ সতর্কতা:</b>
+👁️ স্ক্রিনে চোখ রাখো
+🛑 প্রস্তুত থাকো বন্ধ করতে
+⚡ দ্রুত মুভমেন্ট সম্ভব
+
+<b>পরবর্তী: 25% দূরত্বে CRITICAL!</b>
+""",
+        'WARNING_1PCT': """
+⚠️ <b>WARNING: {pair}</b>
+
+💰 বর্তমান: ${price}
+📉 এন্ট্রির বিপরীতে: {against_pct:.2f}%
+🎯 এন্ট্রি ছিল: ${entry_avg:.4f}
+
+<b>খেয়াল করো:</b>
+📊 ট্রেড ভুল দিকে যাচ্ছে
+🛑 SL হিট হতে পারে
+👁️ মনিটরিং বাড়াও
+
+<b>ঐচ্ছিক:</b>
+Early exit বিবেচনা করতে পারো
+""",
+        'NEAR_BE': """
+⚪ <b>{pair} Near Breakeven</b>
+
+💰 বর্তমান: ${price}
+⚪ BE: ${be:.4f}
+
+<b>সুযোগ!</b>
+🎯 দাম BE এর কাছে
+✅ প্রফিট জোনে যেতে পারে
+🛡️ SL রেডি রাখো
+
+<b>পরবর্তী:</b>
+উপরে গেলে → TP1
+নিচে গেলে → SL চেক
+""",
+        'LIQUIDATION': """
+💀💀💀 <b>LIQUIDATION RISK: {pair}</b> 💀💀💀
+
+💰 বর্তমান: ${price}
+🛡️ SL: ${sl}
+📊 দূরত্ব: মাত্র {pct_to_sl:.1f}%!
+
+<b>🚨 লিকুইডেশন সম্ভব!</b>
+🔥 হাই লেভারেজ = বিপদ
+❌ <b>তুরন্ত বন্ধ করো!</b>
+📉 আর অপেক্ষা না
+
+<b>বাঁচতে হলে এখনই ক্লোজ!</b>
+""",
+        'BE_REJECT': """
+💔 <b>{pair} BE REJECTION!</b>
+
+💰 বর্তমান: ${price}
+⚪ BE ছিল: ${be:.4f}
+📉 দিক: নিচে (বিপরীতে)
+
+<b>⚠️ সতর্কতা:</b>
+🛑 BE থেকে বাউন্স খেলো
+📉 আবার লস জোনে
+🛡️ SL এখন BE তে: ${sl}
+
+<b>কী করবে:</b>
+1️⃣ অপেক্ষা করো SL হিটের
+2️⃣ Early close করো
+3️⃣ DCA বিবেচনা করো
+
+<b>মনে রাখো:</b>
+লস হবে না কারণ SL BE তে!
+""",
+        'RAPID_MOVE': """
+{emoji} <b>RAPID {move}: {pair}</b> {emoji}
+
+💰 বর্তমান: ${price}
+⚡ গত ৫ মিনিটে: ১%+ মুভ
+📊 অস্বাভাবিক ভোলাটিলিটি
+
+<b>🚨 সতর্ক!</b>
+👁️ স্ক্রিনে চোখ রাখো
+🛑 ম্যানুয়ালি ক্লোজ করতে পারো
+📉 বড় মুভ আসতে পারে
+
+<b>কারণ:</b>
+বড় নিউজ/হোয়েল এক্টিভিটি
+""",
+        'TIME_30MIN': """
+⏰ <b>TIME WARNING: {pair}</b>
+
+⏳ বাকি সময়: {minutes} মিনিট
+⏱️ সিগন্যাল এক্সপায়ার হতে চলেছে
+
+<b>স্ট্যাটাস:</b>
+TP1: {tp1_mark}
+TP2: {tp2_mark}
+TP3: {tp3_mark}
+
+<b>কী করবে:</b>
+🎯 এন্ট্রি নিতে হলে এখনই নাও
+❌ না হলে নতুন সিগন্যাল অপেক্ষা করো
+""",
+        'EXPIRED': """
+⏰ <b>{pair} সিগন্যাল এক্সপায়ার্ড!</b>
+
+⏱️ ভ্যালিডিটি শেষ হয়ে গেছে
+📊 আর এন্ট্রি নিও না
+
+<b>স্ট্যাটাস:</b>
+❌ পেন্ডিং ছিল, এন্ট্রি হয়নি
+🗑️ এই সিগন্যাল ইগনোর করো
+
+<b>পরবর্তী:</b>
+নতুন সিগন্যালের জন্য অপেক্ষা করো
+""",
+    },
+    'en': {
+        'ENTRY_ZONE': """
+🎯 <b>{pair} in entry zone!</b>
+
+💰 Price: ${price}
+📊 Zone: ${entry_min} - ${entry_max}
+
+<b>🎯 Targets:</b>
+🥇 TP1: ${tp1}
+🥈 TP2: ${tp2}
+🥉 TP3: ${tp3}
+🛡️ SL: ${stop_loss}
+
+✅ Open the trade now!
+""",
+        'TP1_APPROACH': """
+🎯 <b>{pair} APPROACHING TP1!</b>
+
+💰 Price: ${price}
+🥇 TP1: ${tp1}
+📊 Progress: {progress:.1f}%
+
+<b>Get ready:</b>
+✅ Prepare to close 30%
+🛡️ Ready to move SL to BE
+""",
+        'TP2_APPROACH': """
+🎯 <b>{pair} APPROACHING TP2!</b>
+
+💰 Price: ${price}
+🥈 TP2: ${tp2}
+📊 Progress: {progress:.1f}%
+
+<b>Status:</b>
+✅ TP1: {tp1_closed}% closed
+🛡️ SL: at BE (${sl})
+""",
+        'TP3_APPROACH': """
+🎯 <b>{pair} APPROACHING TP3!</b>
+
+💰 Price: ${price}
+🥉 TP3: ${tp3}
+📊 Progress: {progress:.1f}%
+
+<b>Status:</b>
+✅ TP1: {tp1_closed}%
+✅ TP2: {tp2_closed}%
+🛡️ SL: at TP1 (${sl})
+""",
+        'TP1_HIT': """
+🥇🥇🥇 <b>{pair} TP1 HIT!</b> 🥇🥇🥇
+
+💰 Price: ${price}
+🎯 TP1: ${tp1}
+💵 Profit: +{p1:.2f}%
+
+<b>📋 Do now:</b>
+1️⃣ <b>Close 30% of the position</b> ✅
+2️⃣ Book the profit 💰
+3️⃣ Move SL → <b>BE</b> 🛡️
+
+<b>🎉 Risk-free trade!</b>
+""",
+        'AFTER_TP1': """
+📋 <b>Strategy after TP1:</b>
+
+<b>Now:</b>
+🥇 TP1: ✅ done (30% closed)
+🛡️ SL: at BE (${be:.4f})
+🥈 TP2: ${tp2}
+🥉 TP3: ${tp3}
+
+<b>Next:</b>
+🎯 TP2 hit → close 30% + SL → TP1
+🎯 TP3 hit → close 40% + full close
+🛑 SL hit → breakeven (no loss!)
+
+<b>✅ This trade can no longer lose!</b>
+""",
+        'TP2_HIT': """
+🥈🥈🥈 <b>{pair} TP2 HIT!</b> 🥈🥈🥈
+
+💰 Price: ${price}
+🎯 TP2: ${tp2}
+💵 TP2 profit: +{p2:.2f}%
+
+<b>📋 Do now:</b>
+1️⃣ <b>Close another 30%</b> (60% total) ✅
+2️⃣ Trail SL → <b>TP1</b> 🔒
+
+<b>Locked profit:</b>
+🥇 TP1: 30% @ ${tp1} (+{p1:.2f}%)
+🥈 TP2: 30% @ ${tp2} (+{p2:.2f}%)
+<b>Total: 60% locked! 💰💰</b>
+""",
+        'AFTER_TP2': """
+📋 <b>Strategy after TP2:</b>
+
+<b>Now:</b>
+🥇 TP1: ✅ 30% @ ${tp1}
+🥈 TP2: ✅ 30% @ ${tp2}
+🛡️ SL: at TP1 (${tp1}) 🔒
+🥉 TP3: ${tp3} (remaining 40%)
+
+<b>Guaranteed:</b>
+💰 <b>At least 60% of profit locked!</b>
+🛡️ SL at TP1 = TP1 profit secured!
+
+<b>Final:</b>
+🎯 TP3 hit → close remaining 40%
+🎉 Full trade complete
+""",
+        'TP3_HIT': """
+🥉🥉🥉 <b>{pair} TP3 HIT!</b> 🥉🥉🥉
+🎉🎉🎉 <b>FINAL TARGET REACHED!</b> 🎉🎉🎉
+
+💰 Price: ${price}
+🎯 TP3: ${tp3}
+💵 TP3 profit: +{p3:.2f}%
+
+<b>🏆 ALL TARGETS COMPLETE!</b>
+
+<b>📋 Final action:</b>
+1️⃣ <b>Close the remaining 40%</b> ✅
+2️⃣ <b>Full position closed!</b> 🎉
+
+<b>💰 Final summary:</b>
+🥇 TP1: 30% × +{p1:.2f}%
+🥈 TP2: 30% × +{p2:.2f}%
+🥉 TP3: 40% × +{p3:.2f}%
+📊 Average: +{avg_profit:.2f}%
+✅ Total: 100% closed
+""",
+        'TRADE_COMPLETE': """
+🎊🎊🎊 <b>TRADE COMPLETE: {pair}</b> 🎊🎊🎊
+
+<b>Summary:</b>
+Pair: {pair}
+Direction: {direction}
+Entry: ${entry_avg:.4f}
+Status: ✅ <b>ALL TP HIT</b>
+
+<b>Profit distribution:</b>
+🥇 TP1 (${tp1}): 30% closed
+🥈 TP2 (${tp2}): 30% closed
+🥉 TP3 (${tp3}): 40% closed
+
+<b>Risk management:</b>
+✅ SL moved to BE
+✅ Trailing SL used
+✅ Partial profits booked
+
+🎉 <b>Ready for the next trade!</b> 🎉
+""",
+        'TP2_MISSED': """
+😢 <b>{pair} TP2 MISSED!</b>
+
+💰 Now: ${price}
+🥈 TP2 was: ${tp2}
+📉 Price fell back from TP2
+
+<b>Status:</b>
+✅ TP1: 30% closed
+🛡️ SL: at BE (${sl})
+❌ TP2: missed
+
+<b>Options:</b>
+1️⃣ Wait for TP2 to be hit again
+2️⃣ Close the rest at market
+3️⃣ SL at BE = no loss
+""",
+        'TP3_MISSED': """
+😢 <b>{pair} TP3 MISSED!</b>
+
+💰 Now: ${price}
+🥉 TP3 was: ${tp3}
+📉 Price fell back from TP3
+
+<b>Status:</b>
+✅ TP1: 30% closed
+✅ TP2: 30% closed
+🛡️ SL: at TP1 (${sl})
+❌ TP3: missed
+
+<b>Options:</b>
+1️⃣ Close the remaining 40% at market
+2️⃣ Wait for another push
+3️⃣ Use a trailing SL
+
+<b>Locked:</b>
+💰 60% already locked in profit
+""",
+        'BE_MOVE': """
+⚪ <b>STOP LOSS MOVED TO BREAKEVEN!</b>
+
+🛡️ Old SL: ${old_sl}
+✅ New SL: ${sl}
+🎯 Entry: ${be:.4f}
+
+<b>🎉 RISK-FREE TRADE!</b>
+❌ No loss possible now
+✅ Only profit or breakeven
+💰 At least 30% profit secured
+""",
+        'TRAILING_SL': """
+🔒 <b>TRAILING SL UPDATED!</b>
+
+🛡️ Old SL: ${old_sl}
+✅ New SL: ${sl} ({new_level})
+💰 {new_level} profit locked!
+
+<b>Guaranteed:</b>
+🥇 TP1 profit: locked ✅
+{tp2_line}
+
+<b>Benefit:</b>
+📉 {new_level} profit stays even if price drops
+🚀 More profit if it keeps going
+💯 Risk free!
+""",
+        'SL_HIT': """
+🛑 <b>{pair} STOP LOSS HIT!</b>
+
+💰 Price: ${price}
+🛡️ SL: ${sl}
+📊 Type: {sl_type}
+
+<b>Result:</b>
+{result}
+
+<b>Closed:</b>
+🥇 TP1: {tp1_closed}%
+🥈 TP2: {tp2_closed}%
+🥉 TP3: {tp3_closed}%
+
+<b>Ready for the next trade! 💪</b>
+""",
+        'CRITICAL_25': """
+🚨🚨🚨 <b>CRITICAL DANGER: {pair}</b> 🚨🚨🚨
+
+💰 Now: ${price}
+🛡️ SL: ${sl}
+📊 Distance: only {pct_to_sl:.1f}% left!
+
+<b>⚡ Close immediately!</b>
+❌ <b>Exit now!</b>
+📉 Loss may grow
+🔥 Liquidation risk!
+
+<b>Don't waste time!</b>
+""",
+        'DANGER_50': """
+🚨 <b>DANGER ALERT: {pair}</b> 🚨
+
+💰 Now: ${price}
+🛡️ SL: ${sl}
+📊 {pct_to_sl:.1f}% of the distance to SL left
+
+<b>⚠️ Caution:</b>
+👁️ Keep an eye on the screen
+🛑 Be ready to close
+⚡ Fast moves possible
+
+<b>Next: CRITICAL at 25%!</b>
+""",
+        'WARNING_1PCT': """
+⚠️ <b>WARNING: {pair}</b>
+
+💰 Now: ${price}
+📉 Against entry: {against_pct:.2f}%
+🎯 Entry was: ${entry_avg:.4f}
+
+<b>Watch out:</b>
+📊 Trade is going the wrong way
+🛑 SL may be hit
+👁️ Monitor closely
+
+<b>Optional:</b>
+Consider an early exit
+""",
+        'NEAR_BE': """
+⚪ <b>{pair} Near Breakeven</b>
+
+💰 Now: ${price}
+⚪ BE: ${be:.4f}
+
+<b>Opportunity!</b>
+🎯 Price is near BE
+✅ Could move into profit
+🛡️ Keep SL ready
+
+<b>Next:</b>
+Up → TP1
+Down → check SL
+""",
+        'LIQUIDATION': """
+💀💀💀 <b>LIQUIDATION RISK: {pair}</b> 💀💀💀
+
+💰 Now: ${price}
+🛡️ SL: ${sl}
+📊 Distance: only {pct_to_sl:.1f}%!
+
+<b>🚨 Liquidation possible!</b>
+🔥 High leverage = danger
+❌ <b>Close immediately!</b>
+📉 Don't wait any longer
+
+<b>Close now to survive!</b>
+""",
+        'BE_REJECT': """
+💔 <b>{pair} BE REJECTION!</b>
+
+💰 Now: ${price}
+⚪ BE was: ${be:.4f}
+📉 Direction: against the trade
+
+<b>⚠️ Caution:</b>
+🛑 Bounced off BE
+📉 Back in the loss zone
+🛡️ SL is now at BE: ${sl}
+
+<b>Options:</b>
+1️⃣ Wait for the SL
+2️⃣ Close early
+3️⃣ Consider DCA
+
+<b>Remember:</b>
+No loss because SL is at BE!
+""",
+        'RAPID_MOVE': """
+{emoji} <b>RAPID {move}: {pair}</b> {emoji}
+
+💰 Now: ${price}
+⚡ Last 5 minutes: 1%+ move
+📊 Unusual volatility
+
+<b>🚨 Careful!</b>
+👁️ Keep an eye on the screen
+🛑 You may close manually
+📉 A big move may follow
+
+<b>Cause:</b>
+Big news / whale activity
+""",
+        'TIME_30MIN': """
+⏰ <b>TIME WARNING: {pair}</b>
+
+⏳ Time left: {minutes} minutes
+⏱️ Signal is about to expire
+
+<b>Status:</b>
+TP1: {tp1_mark}
+TP2: {tp2_mark}
+TP3: {tp3_mark}
+
+<b>Options:</b>
+🎯 Enter now if you still want the trade
+❌ Otherwise wait for a new signal
+""",
+        'EXPIRED': """
+⏰ <b>{pair} signal expired!</b>
+
+⏱️ Validity is over
+📊 Don't enter anymore
+
+<b>Status:</b>
+❌ Was pending, no entry
+🗑️ Ignore this signal
+
+<b>Next:</b>
+Wait for a new signal
+""",
+    },
+}
+
+# Locale-specific fragments that depend on trade state
+PHRASES = {
+    'bn': {
+        'tp2_locked': '🥈 TP2 প্রফিট: লকড ✅',
+        'tp2_running': '🥈 TP2: চলছে...',
+        'sl_result_tp2': '💰💰 প্রফিটে (৬০% লকড)!',
+        'sl_result_tp1': '⚪ ব্রেকইভেন (৩০% প্রফিট)!',
+        'sl_result_loss': '❌ লস',
+        'sl_type_tp2': 'Trailing (TP2 লকড)',
+        'sl_type_tp1': 'BE (TP1 লকড)',
+        'sl_type_initial': 'Initial SL',
+        'pump': 'পাম্প',
+        'dump': 'ডাম্প',
+    },
+    'en': {
+        'tp2_locked': '🥈 TP2 profit: locked ✅',
+        'tp2_running': '🥈 TP2: running...',
+        'sl_result_tp2': '💰💰 In profit (60% locked)!',
+        'sl_result_tp1': '⚪ Breakeven (30% profit)!',
+        'sl_result_loss': '❌ Loss',
+        'sl_type_tp2': 'Trailing (TP2 locked)',
+        'sl_type_tp1': 'BE (TP1 locked)',
+        'sl_type_initial': 'Initial SL',
+        'pump': 'PUMP',
+        'dump': 'DUMP',
+    },
+}
+
+DEFAULT_LOCALE = 'bn'
+
+_COMPILED = {
+    locale: {alert_type: template.format_map for alert_type, template in templates.items()}
+    for locale, templates in TEMPLATES.items()
+}
+
+
+class AlertRenderer:
+    def __init__(self, locale: str = ALERT_LOCALE):
+        self.locale = locale if locale in _COMPILED else DEFAULT_LOCALE
+
+    def render(self, event: AlertEvent, trade: Trade, locale: Optional[str] = None) -> str:
+        """Render a single alert event"""
+        return self.render_many([event], trade, locale)[0]
+
+    def render_many(self, events: List[AlertEvent], trade: Trade, locale: Optional[str] = None) -> List[str]:
+        """Render events of one trade, sharing the per-trade values"""
+        locale = locale if locale in _COMPILED else self.locale
+        templates = _COMPILED[locale]
+        fallback = _COMPILED[DEFAULT_LOCALE]
+        phrases = PHRASES[locale]
+        base = self._trade_values(trade)
+
+        messages = []
+        for event in events:
+            fmt = templates.get(event.type) or fallback[event.type]
+            values = dict(base)
+            values['price'] = event.price
+            values.update(event.metrics)
+            self._add_derived(event, trade, values, phrases)
+            messages.append(fmt(values))
+        return messages
+
+    # ============ VALUE BUILDERS ============
+
+    def _trade_values(self, trade: Trade) -> Dict:
+        entry = trade.entry_avg
+        if trade.direction == 'LONG':
+            p1 = ((trade.tp1 - entry) / entry) * 100 if entry else 0
+            p2 = ((trade.tp2 - entry) / entry) * 100 if entry else 0
+            p3 = ((trade.tp3 - entry) / entry) * 100 if entry else 0
+        else:
+            p1 = ((entry - trade.tp1) / entry) * 100 if entry else 0
+            p2 = ((entry - trade.tp2) / entry) * 100 if entry else 0
+            p3 = ((entry - trade.tp3) / entry) * 100 if entry else 0
+
+        return {
+            'pair': trade.pair,
+            'direction': trade.direction,
+            'entry_min': trade.entry_min,
+            'entry_max': trade.entry_max,
+            'entry_avg': entry,
+            'tp1': trade.tp1,
+            'tp2': trade.tp2,
+            'tp3': trade.tp3,
+            'stop_loss': trade.stop_loss,
+            'be': trade.breakeven_price,
+            'sl': trade.current_sl,
+            'tp1_closed': trade.tp1_closed_percent,
+            'tp2_closed': trade.tp2_closed_percent,
+            'tp3_closed': trade.tp3_closed_percent,
+            'p1': p1,
+            'p2': p2,
+            'p3': p3,
+            'avg_profit': (p1 + p2 + p3) / 3,
+        }
+
+    def _add_derived(self, event: AlertEvent, trade: Trade, values: Dict, phrases: Dict):
+        alert_type = event.type
+
+        if alert_type == 'TRAILING_SL':
+            level = values['level']
+            values['new_level'] = {1: "TP1", 2: "TP2"}.get(level, "TP")
+            values['tp2_line'] = phrases['tp2_locked'] if level >= 2 else phrases['tp2_running']
+
+        elif alert_type == 'SL_HIT':
+            if trade.tp2_hit:
+                values['result'] = phrases['sl_result_tp2']
+                values['sl_type'] = phrases['sl_type_tp2']
+            elif trade.tp1_hit:
+                values['result'] = phrases['sl_result_tp1']
+                values['sl_type'] = phrases['sl_type_tp1']
+            else:
+                values['result'] = phrases['sl_result_loss']
+                values['sl_type'] = phrases['sl_type_initial']
+
+        elif alert_type == 'RAPID_MOVE':
+            move = phrases['pump'] if trade.direction == "SHORT" else phrases['dump']
+            values['move'] = move.upper()
+            values['emoji'] = "🚀" if trade.direction == "LONG" else "💥"
+
+        elif alert_type == 'TIME_30MIN':
+            values['minutes'] = int(values['seconds_left'] / 60)
+            for n in (1, 2, 3):
+                values[f'tp{n}_mark'] = '✅' if values[f'tp{n}_hit'] else '❌'
+
+
+# Global instance
+renderer = AlertRenderer()
@@ -0,0 +1,418 @@
+# backtest.py
+"""Replay historical candles through AlertManager for a batch of signals
+
+    python backtest.py signals.csv --candles data/ [--workers 8] [--json out.json]
+    python backtest.py signals.csv --candles data/ --monitor
+
+
+Signals are read like a bulk import (a .txt of signal messages or a CSV with
+CSV_COLUMNS; a `created_at` column sets when each signal was given). Candles
+are one CSV per pair in the candles directory, e.g. data/SEIUSDT.csv, with a
+header `timestamp,open,high,low,close[,volume]`; timestamps are epoch seconds,
+epoch milliseconds or ISO times in UTC.
+
+Each candle is one price update: pair_tick(close, high, low) at the candle's
+time. When TP and SL both fall inside one candle the rule table order
+decides, as it does for a live poll.
+
+--monitor instead runs the real TradeMonitor (polling every CHECK_INTERVAL,
+outbox, rendering) on a VirtualClock, with the candles as its price source
+and a bot that records messages, so hours of market replay in seconds.
+"""
+import argparse
+import asyncio
+import bisect
+import contextlib
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+# config.py validates the bot settings at import; a backtest needs neither
+os.environ.setdefault('BOT_TOKEN', 'backtest')
+os.environ.setdefault('CHAT_ID', '0')
+
+from alert_manager import AlertManager
+from clock import VirtualClock
+from database import Trade, TradeDatabase
+from signal_parser import SignalParser
+from subscribers import SubscriberRegistry
+from trade_monitor import TradeMonitor
+
+# (time, open, high, low, close)
+Candle = Tuple[datetime, float, float, float, float]
+
+# Candles of the pairs a worker process already loaded
+_CANDLES: Dict[str, Tuple[List[datetime], List[Candle]]] = {}
+
+
+# ========== CANDLES ==========
+
+def parse_time(value: str) -> datetime:
+    """Epoch seconds/milliseconds or an ISO time, as naive UTC"""
+    try:
+        stamp = float(value)
+    except ValueError:
+        moment = datetime.fromisoformat(value)
+        if moment.tzinfo:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        return moment
+    if stamp > 1e11:
+        stamp /= 1000
+    return datetime.fromtimestamp(stamp, timezone.utc).replace(tzinfo=None)
+
+
+def load_candles(path: str) -> List[Candle]:
+    """OHLCV rows of one pair, sorted by time"""
+    candles = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            row = {k.strip().lower(): v for k, v in row.items() if k}
+            stamp = row.get('timestamp') or row.get('time') or row.get('open_time')
+            candles.append((
+                parse_time(stamp.strip()),
+                float(row['open']),
+                float(row['high']),
+                float(row['low']),
+                float(row['close']),
+            ))
+    candles.sort(key=lambda c: c[0])
+    return candles
+
+
+def _pair_candles(candle_dir: str, pair: str) -> Optional[Tuple[List[datetime], List[Candle]]]:
+    if pair not in _CANDLES:
+        path = os.path.join(candle_dir, f"{pair}.csv")
+        if not os.path.exists(path):
+            return None
+        candles = load_candles(path)
+        _CANDLES[pair] = ([c[0] for c in candles], candles)
+    return _CANDLES[pair]
+
+
+# ========== REPLAY ==========
+
+def r_multiple(trade: Trade, exit_price: Optional[float]) -> float:
+    """Realized R of an entered trade: closed TP parts plus the rest at exit_price"""
+    entry = trade.entry_price
+    risk = abs(entry - trade.stop_loss)
+    if not risk:
+        return 0.0
+    sign = 1 if trade.direction == 'LONG' else -1
+
+    def r(price):
+        return sign * (price - entry) / risk
+
+    total = (trade.tp1_closed_percent * r(trade.tp1)
+             + trade.tp2_closed_percent * r(trade.tp2)
+             + trade.tp3_closed_percent * r(trade.tp3))
+    remaining = trade.get_remaining_position()
+    if remaining > 0 and exit_price is not None:
+        total += remaining * r(exit_price)
+    return total / 100
+
+
+def replay(trade: Trade, candles: List[Candle], times: List[datetime], horizon: timedelta) -> dict:
+    """Run one signal through a fresh AlertManager until it closes, expires or the horizon ends"""
+    manager = AlertManager(profile=False)
+    alerts = Counter()
+    end = trade.created_at + horizon
+    replayed = 0
+
+    for moment, _, high, low, close in candles[bisect.bisect_left(times, trade.created_at):]:
+        if moment > end:
+            break
+        tick = manager.pair_tick(trade.pair, close, high, low, now=moment)
+        for event in manager.check_alerts(trade, tick):
+            alerts[event.type] += 1
+        replayed += 1
+        if is_done(trade):
+            break
+    return trade_result(trade, alerts, replayed)
+
+
+def is_done(trade: Trade) -> bool:
+    # After TP3 nothing of the position is left
+    return trade.status in ('CLOSED', 'EXPIRED') or trade.tp3_hit
+
+
+def trade_result(trade: Trade, alerts: Counter, replayed: int) -> dict:
+    # Only SL_HIT closes a replayed trade; an open one is valued at the last price
+    if trade.status == 'CLOSED':
+        exit_price = trade.current_sl
+    else:
+        exit_price = trade.price_history[-1]['price'] if trade.price_history else None
+
+    entered = trade.entry_price is not None
+    if not entered:
+        # TP/SL rules also run on pending trades: price left through a level unfilled
+        outcome = trade.status if trade.status in ('PENDING', 'EXPIRED') else 'MISSED'
+    elif trade.tp3_hit:
+        outcome = 'TP3'
+    elif trade.tp2_hit:
+        outcome = 'TP2'
+    elif trade.tp1_hit:
+        outcome = 'TP1'
+    elif trade.status == 'CLOSED':
+        outcome = 'SL'
+    else:
+        outcome = 'OPEN'
+
+    return {
+        'id': trade.id,
+        'pair': trade.pair,
+        'direction': trade.direction,
+        'created_at': trade.created_at.isoformat(),
+        'outcome': outcome,
+        'entered': entered,
+        'r': round(r_multiple(trade, exit_price), 4) if entered else 0.0,
+        'candles': replayed,
+        'alerts': dict(alerts),
+    }
+
+
+def no_data(trade: Trade) -> dict:
+    return {'id': trade.id, 'pair': trade.pair, 'outcome': 'NO_DATA',
+            'entered': False, 'r': 0.0, 'candles': 0, 'alerts': {}}
+
+
+def place_signal(trade: Trade, times: List[datetime], start: Optional[datetime]):
+    if start is not None:
+        trade.created_at = start
+    elif trade.created_at > times[-1]:
+        # Signals without a time (text imports) start at the first candle
+        trade.created_at = times[0]
+
+
+def run_batch(candle_dir: str, trades: List[Trade], horizon_hours: float,
+              start: Optional[datetime] = None) -> List[dict]:
+    """Replay a batch of signals of one pair (one process pool task)"""
+    results = []
+    for trade in trades:
+        data = _pair_candles(candle_dir, trade.pair)
+        if not data or not data[1]:
+            results.append(no_data(trade))
+            continue
+        times, candles = data
+        place_signal(trade, times, start)
+        results.append(replay(trade, candles, times, timedelta(hours=horizon_hours)))
+    return results
+
+
+def batches(trades: List[Trade], size: int) -> List[List[Trade]]:
+    """Group signals by pair so each worker loads a pair's candles once"""
+    by_pair = defaultdict(list)
+    for trade in trades:
+        by_pair[trade.pair].append(trade)
+    return [group[i:i + size] for group in by_pair.values() for i in range(0, len(group), size)]
+
+
+def run_backtest(trades: List[Trade], candle_dir: str, workers: int = 0, batch_size: int = 200,
+                 horizon_hours: float = 72, start: Optional[datetime] = None) -> List[dict]:
+    jobs = batches(trades, batch_size)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        return [r for job in jobs for r in run_batch(candle_dir, job, horizon_hours, start)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_batch, candle_dir, job, horizon_hours, start) for job in jobs]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+# ========== MONITOR REPLAY ==========
+
+class CandleFeed:
+    """TradeMonitor price source serving the candles at the clock's time"""
+
+    def __init__(self, candle_dir: str, clock: VirtualClock):
+        self.candle_dir = candle_dir
+        self.clock = clock
+
+    def test_connection(self) -> bool:
+        return True
+
+    def get_price(self, symbol: str) -> float:
+        data = _pair_candles(self.candle_dir, symbol)
+        if not data:
+            return 0.0
+        times, candles = data
+        index = bisect.bisect_right(times, self.clock.utcnow()) - 1
+        return candles[index][4] if index >= 0 else 0.0
+
+    def get_price_range(self, symbol: str, since_ms: int,
+                        until_ms: Optional[int] = None) -> Tuple[Optional[float], Optional[float]]:
+        data = _pair_candles(self.candle_dir, symbol)
+        if not data:
+            return None, None
+        times, candles = data
+        since = parse_time(str(since_ms))
+        until = parse_time(str(until_ms)) if until_ms is not None else self.clock.utcnow()
+        window = candles[bisect.bisect_right(times, since):bisect.bisect_right(times, until)]
+        if not window:
+            return None, None
+        return max(c[2] for c in window), min(c[3] for c in window)
+
+
+class RecordingBot:
+    """Stands in for telegram.Bot: keeps what would have been sent"""
+
+    def __init__(self):
+        self.messages: List[Tuple[str, str]] = []
+
+    async def send_message(self, chat_id, text: str, **kwargs):
+        self.messages.append((str(chat_id), text))
+
+
+def replay_monitor(trades: List[Trade], candle_dir: str, horizon_hours: float = 72,
+                   start: Optional[datetime] = None) -> Tuple[List[dict], dict]:
+    """Run TradeMonitor over the candles; signals arrive at their created_at"""
+    results, replayed = [], []
+    for trade in trades:
+        data = _pair_candles(candle_dir, trade.pair)
+        if not data or not data[1]:
+            results.append(no_data(trade))
+            continue
+        place_signal(trade, data[0], start)
+        replayed.append(trade)
+    if not replayed:
+        return results, {}
+    replayed.sort(key=lambda t: t.created_at)
+
+    clock = VirtualClock(replayed[0].created_at)
+    end = replayed[-1].created_at + timedelta(hours=horizon_hours)
+    bot = RecordingBot()
+
+    async def run(monitor: TradeMonitor):
+        task = asyncio.create_task(monitor.monitor_loop())
+        for trade in replayed:
+            await clock.async_sleep((trade.created_at - clock.utcnow()).total_seconds())
+            monitor.db.add(trade)
+        await clock.async_sleep((end - clock.utcnow()).total_seconds())
+        monitor.stop()
+        outbox = monitor.outbox
+        while outbox.buffers or outbox.queue.qsize() or outbox.in_flight:
+            # Let the senders drain what the last cycles queued
+            await clock.async_sleep(1)
+        task.cancel()
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        monitor = TradeMonitor('replay', db=TradeDatabase(filename=None),
+                               subscribers=SubscriberRegistry(os.path.join(tmp, 'subscribers.json')),
+                               clock=clock, prices=CandleFeed(candle_dir, clock), bot=bot)
+        clock.run(run(monitor))
+
+    # Counts of fired rules: the monitor keeps no per-event tally
+    for trade in replayed:
+        results.append(trade_result(trade, Counter(trade.alerts_sent), len(trade.price_history)))
+    stats = {
+        'simulated_hours': round(clock.monotonic() / 3600, 2),
+        'cycles': monitor.cycle_stats['cycles'],
+        'messages': len(bot.messages),
+    }
+    return results, stats
+
+
+# ========== REPORT ==========
+
+def summarize(results: List[dict]) -> dict:
+    """Hit rates over entered trades, R multiples and alert counts"""
+    outcomes = Counter(r['outcome'] for r in results)
+    entered = [r for r in results if r['entered']]
+    rs = [r['r'] for r in entered]
+    alerts = Counter()
+    for r in results:
+        alerts.update(r['alerts'])
+
+    def rate(count):
+        return round(count / len(entered) * 100, 2) if entered else 0.0
+
+    wins = [x for x in rs if x > 0]
+    losses = [x for x in rs if x < 0]
+    return {
+        'signals': len(results),
+        'entered': len(entered),
+        'fill_rate': round(len(entered) / len(results) * 100, 2) if results else 0.0,
+        'outcomes': dict(outcomes),
+        'hit_rates': {
+            'TP1': rate(sum(1 for r in entered if r['outcome'] in ('TP1', 'TP2', 'TP3'))),
+            'TP2': rate(sum(1 for r in entered if r['outcome'] in ('TP2', 'TP3'))),
+            'TP3': rate(outcomes['TP3']),
+            'SL': rate(outcomes['SL']),
+        },
+        'win_rate': rate(len(wins)),
+        'total_r': round(sum(rs), 2),
+        'avg_r': round(sum(rs) / len(rs), 3) if rs else 0.0,
+        'avg_win_r': round(sum(wins) / len(wins), 3) if wins else 0.0,
+        'avg_loss_r': round(sum(losses) / len(losses), 3) if losses else 0.0,
+        'profit_factor': round(sum(wins) / -sum(losses), 2) if losses else None,
+        'alerts': dict(alerts.most_common()),
+    }
+
+
+def format_report(summary: dict, seconds: float) -> str:
+    lines = [
+        f"📊 Backtest: {summary['signals']} signals in {seconds:.1f}s",
+        f"   Entered: {summary['entered']} ({summary['fill_rate']}%)",
+        "   Outcomes: " + ", ".join(f"{k} {v}" for k, v in sorted(summary['outcomes'].items())),
+        "   Hit rates: " + ", ".join(f"{k} {v}%" for k, v in summary['hit_rates'].items()),
+        f"   Win rate: {summary['win_rate']}%",
+        f"   R: total {summary['total_r']}, avg {summary['avg_r']}, "
+        f"avg win {summary['avg_win_r']}, avg loss {summary['avg_loss_r']}, "
+        f"profit factor {summary['profit_factor']}",
+        "   Alerts:",
+    ]
+    lines += [f"      {name}: {count}" for name, count in summary['alerts'].items()]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay historical candles through the alert engine")
+    parser.add_argument('signals', help="signal messages (.txt) or CSV file")
+    parser.add_argument('--candles', required=True, help="directory with one <PAIR>.csv of OHLCV per pair")
+    parser.add_argument('--workers', type=int, default=0, help="processes (default: CPU count)")
+    parser.add_argument('--batch', type=int, default=200, help="signals per pool task")
+    parser.add_argument('--horizon', type=float, default=72, help="hours to follow an entered trade")
+    parser.add_argument('--start', help="ISO time every signal is given at (default: its created_at)")
+    parser.add_argument('--json', help="write the summary and per-signal results here")
+    parser.add_argument('--monitor', action='store_true',
+                        help="replay through TradeMonitor on a virtual clock instead")
+    args = parser.parse_args()
+
+    with open(args.signals, encoding='utf-8') as f:
+        trades, errors = SignalParser().parse_many(f.read())
+    for error in errors:
+        print(f"⚠️ Skipped signal {error}")
+    if not trades:
+        print("❌ No valid signals")
+        return
+
+    started = time.perf_counter()
+    start = parse_time(args.start) if args.start else None
+    if args.monitor:
+        results, stats = replay_monitor(trades, args.candles, args.horizon, start)
+    else:
+        results = run_backtest(trades, args.candles, args.workers, args.batch, args.horizon, start)
+    summary = summarize(results)
+    print(format_report(summary, time.perf_counter() - started))
+    if args.monitor and stats:
+        summary['monitor'] = stats
+        print(f"   Monitor: {stats['simulated_hours']}h simulated, {stats['cycles']} cycles, "
+              f"{stats['messages']} messages")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'summary': summary, 'results': results}, f, indent=2)
+        print(f"💾 Results saved to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+# benchmark.py
+"""Benchmarks of the hot paths, written to a JSON file runs can be compared with
+
+    python benchmark.py [--sizes 100,1000,10000] [--monitor-sizes 10,100]
+                        [--out benchmark.json] [--compare old.json]
+
+Covers AlertManager.check_alerts per trade, SignalParser.parse (fresh and
+cached), TradeDatabase load/save/update per database size and a full
+TradeMonitor cycle against a stub price source and a recording bot on a
+VirtualClock. Each result is the best of --repeat runs. With --compare,
+results slower than --threshold times the old run are listed and the exit
+status is 1.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from io import StringIO
+from typing import Callable, Dict, List, Optional
+
+# config.py validates the bot settings at import; benchmarks need neither
+os.environ.setdefault('BOT_TOKEN', 'benchmark')
+os.environ.setdefault('CHAT_ID', '0')
+
+from alert_manager import AlertManager
+from backtest import RecordingBot
+from clock import VirtualClock
+from config import CHECK_INTERVAL
+from database import Trade, TradeDatabase
+from signal_parser import SignalParser
+from subscribers import SubscriberRegistry
+from trade_monitor import TradeMonitor
+
+SIGNAL = """🔴 {pair} | {direction}
+📊 Strength: 72/100
+🎯 Entry: ${entry_min:.4f} - ${entry_max:.4f}
+🛑 SL: ${sl:.4f}
+🥇 TP1: ${tp1:.4f}
+🥈 TP2: ${tp2:.4f}
+🥉 TP3: ${tp3:.4f}
+💵 Risk: 1%
+⚡ Leverage: 3-5x
+⏳ Valid: 4h"""
+
+PAIRS = ['SEIUSDT', 'BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'TIAUSDT', 'BNBUSDT', 'ADAUSDT', 'DOTUSDT']
+
+
+# ========== FIXTURES ==========
+
+def signal_text(rng: random.Random, pair: Optional[str] = None) -> str:
+    price = rng.uniform(0.1, 100)
+    direction = rng.choice(['LONG', 'SHORT'])
+    side = 1 if direction == 'LONG' else -1
+    return SIGNAL.format(
+        pair=pair or rng.choice(PAIRS), direction=direction,
+        entry_min=price * 0.998, entry_max=price * 1.002,
+        sl=price * (1 - side * 0.02), tp1=price * (1 + side * 0.02),
+        tp2=price * (1 + side * 0.035), tp3=price * (1 + side * 0.05),
+    )
+
+
+def make_trades(count: int, seed: int = 1, history: int = 20) -> List[Trade]:
+    """Trades spread over PAIRS with some price history, as after a few polls"""
+    rng = random.Random(seed)
+    parser = SignalParser(cache_size=0)
+    trades = []
+    for i in range(count):
+        trade = parser.parse(signal_text(rng, PAIRS[i % len(PAIRS)]))
+        trade.id = f"{i:08d}"
+        trade.price_history = [{'time': trade.created_at.isoformat(), 'price': trade.entry_avg}] * history
+        trades.append(trade)
+    return trades
+
+
+class WalkFeed:
+    """Stub price source: a random walk per pair around each pair's first trade"""
+
+    def __init__(self, trades: List[Trade], seed: int = 1):
+        self.rng = random.Random(seed)
+        self.prices: Dict[str, float] = {}
+        for trade in trades:
+            self.prices.setdefault(trade.pair, trade.entry_avg)
+
+    def test_connection(self) -> bool:
+        return True
+
+    def get_price(self, symbol: str) -> float:
+        self.prices[symbol] *= 1 + self.rng.gauss(0, 0.002)
+        return self.prices[symbol]
+
+    def get_price_range(self, symbol: str, since_ms: int, until_ms: Optional[int] = None):
+        price = self.prices[symbol]
+        return price * 1.001, price * 0.999
+
+
+# ========== TIMING ==========
+
+def best_of(func: Callable[..., int], repeat: int, setup: Optional[Callable] = None) -> dict:
+    """Run func (returning its op count) `repeat` times; keep the fastest run
+
+    setup() builds fresh, untimed input for each run and is passed to func.
+    """
+    best, ops = float('inf'), 0
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        started = time.perf_counter()
+        ops = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return {'ops': ops, 'seconds': round(best, 6), 'us_per_op': round(best / ops * 1e6, 3) if ops else None}
+
+
+# ========== BENCHMARKS ==========
+
+def bench_check_alerts(size: int, repeat: int, ticks: int = 50) -> dict:
+    def run(trades):
+        feed = WalkFeed(trades)
+        manager = AlertManager(profile=False, clock=VirtualClock())
+        by_pair: Dict[str, List[Trade]] = {}
+        for trade in trades:
+            by_pair.setdefault(trade.pair, []).append(trade)
+        now = datetime(2024, 1, 1)
+        checks = 0
+        for i in range(ticks):
+            now += timedelta(seconds=CHECK_INTERVAL)
+            for pair, group in by_pair.items():
+                high, low = feed.get_price_range(pair, 0)
+                tick = manager.pair_tick(pair, feed.get_price(pair), high, low, now=now)
+                for trade in group:
+                    manager.check_alerts(trade, tick)
+                checks += len(group)
+        return checks
+    return best_of(run, repeat, setup=lambda: make_trades(size))
+
+
+def bench_parse(count: int, repeat: int, cached: bool) -> dict:
+    rng = random.Random(2)
+    texts = [signal_text(rng) for _ in range(count)]
+
+    parser = SignalParser(cache_size=count if cached else 0)
+    for text in texts:
+        parser.lookup(text)
+
+    def run():
+        for text in texts:
+            parser.parse(text)
+        return count
+    return best_of(run, repeat)
+
+
+def bench_database(size: int, repeat: int, updates: int = 20) -> Dict[str, dict]:
+    trades = make_trades(size)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'trades.json')
+        db = TradeDatabase(filename)
+        db.add_many(trades)
+        results['save'] = best_of(lambda: db.save() or 1, repeat)
+        results['load'] = best_of(lambda: TradeDatabase(filename) and 1, repeat)
+
+        def update():
+            for trade in trades[-updates:]:
+                trade.price_history.append({'time': '', 'price': trade.entry_avg})
+                db.update(trade)
+            return updates
+        results['update'] = best_of(update, repeat)
+        results['file_bytes'] = os.path.getsize(filename)
+    return results
+
+
+def bench_monitor_cycle(size: int, repeat: int, cycles: int = 5) -> dict:
+    """Full cycles: price fetches, alert checks, rendering, trades.json writes, sends"""
+    tmp = tempfile.TemporaryDirectory()
+
+    def setup() -> TradeMonitor:
+        trades = make_trades(size)
+        filename = os.path.join(tmp.name, 'trades.json')
+        if os.path.exists(filename):
+            os.remove(filename)
+        db = TradeDatabase(filename)
+        db.add_many(trades)
+        with redirect_stdout(StringIO()):
+            return TradeMonitor('benchmark', db=db, clock=VirtualClock(), prices=WalkFeed(trades),
+                                bot=RecordingBot(),
+                                subscribers=SubscriberRegistry(os.path.join(tmp.name, 'subscribers.json')))
+
+    def run(monitor: TradeMonitor) -> int:
+        clock = monitor.clock
+
+        async def cycles_then_stop():
+            task = asyncio.create_task(monitor.monitor_loop())
+            await clock.async_sleep(CHECK_INTERVAL * cycles - 1)
+            monitor.stop()
+            task.cancel()
+
+        with redirect_stdout(StringIO()):
+            clock.run(cycles_then_stop())
+        run.stats = monitor.profile_snapshot()['cycles']
+        run.messages = len(monitor.telegram.messages)
+        return run.stats['cycles']
+
+    with tmp:
+        result = best_of(run, repeat, setup)
+    result['trades_per_cycle'] = size
+    result['avg_cycle_ms'] = round(run.stats['avg_ns'] / 1e6, 3)
+    result['max_cycle_ms'] = round(run.stats['max_ns'] / 1e6, 3)
+    result['messages'] = run.messages
+    return result
+
+
+# ========== RUN / COMPARE ==========
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_all(sizes: List[int], monitor_sizes: List[int], repeat: int) -> dict:
+    results = {}
+
+    def record(name: str, result: dict):
+        results[name] = result
+        per_op = result.get('us_per_op')
+        print(f"⏱️ {name}: {per_op} µs/op ({result.get('ops')} ops)")
+
+    record('parse.fresh', bench_parse(1000, repeat, cached=False))
+    record('parse.cached', bench_parse(1000, repeat, cached=True))
+    for size in sizes:
+        record(f'check_alerts.{size}', bench_check_alerts(size, repeat))
+        for op, result in bench_database(size, repeat).items():
+            if isinstance(result, dict):
+                record(f'database.{op}.{size}', result)
+            else:
+                results[f'database.{op}.{size}'] = result
+    for size in monitor_sizes:
+        record(f'monitor_cycle.{size}', bench_monitor_cycle(size, repeat))
+
+    return {
+        'meta': {
+            'time': datetime.utcnow().isoformat(),
+            'commit': git_commit(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(new: dict, old: dict, threshold: float) -> List[str]:
+    """Benchmarks whose time per op grew by more than `threshold` times"""
+    regressions = []
+    for name, result in new['results'].items():
+        before = old.get('results', {}).get(name)
+        if not isinstance(result, dict) or not isinstance(before, dict):
+            continue
+        if result.get('us_per_op') and before.get('us_per_op'):
+            ratio = result['us_per_op'] / before['us_per_op']
+            if ratio > threshold:
+                regressions.append(f"{name}: {before['us_per_op']} → {result['us_per_op']} µs/op (x{ratio:.2f})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the alert, parser, database and monitor hot paths")
+    parser.add_argument('--sizes', default='100,1000,10000', help="trade counts, comma separated")
+    # A cycle rewrites trades.json once per trade, so large sizes take minutes
+    parser.add_argument('--monitor-sizes', default='10,100', help="trade counts of the monitor cycle benchmark")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per benchmark; the fastest is kept")
+    parser.add_argument('--out', default='benchmark.json', help="results file")
+    parser.add_argument('--compare', help="earlier results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=1.2, help="slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    report = run_all([int(s) for s in args.sizes.split(',') if s],
+                     [int(s) for s in args.monitor_sizes.split(',') if s], args.repeat)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results saved to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print("❌ Regressions:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print("✅ No regressions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# clock.py
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+
+class Clock:
+    """Wall clock; every time read and sleep of the monitor goes through one"""
+
+    def utcnow(self) -> datetime:
+        return datetime.utcnow()
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+    async def async_sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+    async def run_blocking(self, func, *args):
+        """Run blocking I/O (price fetches) off the event loop"""
+        return await asyncio.to_thread(func, *args)
+
+    def run(self, coro):
+        return asyncio.run(coro)
+
+
+class VirtualClock(Clock):
+    """Simulated time for replays and tests
+
+    Time only moves when something sleeps. Blocking sleeps advance it
+    directly; coroutines run with run() on an event loop whose time is this
+    clock, and whenever that loop is idle the clock jumps straight to the
+    next timer instead of waiting for it. Blocking calls run inline:
+    simulated I/O takes no time.
+    """
+
+    def __init__(self, start: Optional[datetime] = None):
+        self.started = start or datetime(2024, 1, 1)
+        self.elapsed = 0.0
+
+    def utcnow(self) -> datetime:
+        return self.started + timedelta(seconds=self.elapsed)
+
+    def time(self) -> float:
+        return self.started.replace(tzinfo=timezone.utc).timestamp() + self.elapsed
+
+    def monotonic(self) -> float:
+        return self.elapsed
+
+    def advance(self, seconds: float):
+        self.elapsed += seconds
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self.advance(seconds)
+
+    async def run_blocking(self, func, *args):
+        return func(*args)
+
+    def new_event_loop(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.new_event_loop()
+        loop.time = self.monotonic
+        select = loop._selector.select
+
+        def virtual_select(timeout=None):
+            # asyncio passes the delay until its next timer when nothing is ready
+            if timeout is not None and timeout > 0:
+                self.advance(timeout)
+                timeout = 0
+            return select(timeout)
+
+        loop._selector.select = virtual_select
+        return loop
+
+    def run(self, coro):
+        loop = self.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            # Like asyncio.run: cancel what is left (outbox senders, ...)
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+
+
+# Production clock, the default of every component taking a `clock`
+real_clock = Clock()
@@ -4,12 +4,15 @@ import hmac
 import hashlib
 import json
 import time
-from typing import Dict, Optional
-from config import COINDCX_API_KEY, COINDCX_SECRET
+from typing import Dict, Optional, Tuple
+from metrics import PRICE_FETCH, PRICE_ERRORS
+from config import COINDCX_API_KEY, COINDCX_SECRET, COINDCX_BASE_URL, COINDCX_PUBLIC_URL, COINGECKO_BASE_URL
 
 class CoinDCXAPI:
     def __init__(self):
-        self.base_url = "https://api.coindcx.com"
+        self.base_url = COINDCX_BASE_URL
+        self.public_url = COINDCX_PUBLIC_URL
+        self.coingecko_url = COINGECKO_BASE_URL
         self.api_key = COINDCX_API_KEY
         self.secret = COINDCX_SECRET
     
@@ -28,6 +31,20 @@ class CoinDCXAPI:
         
         return signature, timestamp
     
+    def _get(self, source: str, endpoint: str, url: str, **kwargs) -> requests.Response:
+        """requests.get with latency and error metrics per source/endpoint"""
+        started = time.perf_counter()
+        try:
+            response = requests.get(url, timeout=10, **kwargs)
+        except Exception:
+            PRICE_ERRORS.inc(source, endpoint)
+            raise
+        finally:
+            PRICE_FETCH.observe(time.perf_counter() - started, source, endpoint)
+        if response.status_code >= 400:
+            PRICE_ERRORS.inc(source, endpoint)
+        return response
+    
     def get_price(self, symbol: str) -> float:
         """Get current price for a symbol"""
         try:
@@ -36,7 +53,7 @@ class CoinDCXAPI:
             
             # Use public API for price
             url = f"{self.base_url}/exchange/ticker"
-            response = requests.get(url, timeout=10)
+            response = self._get('coindcx', 'ticker', url)
             data = response.json()
             
             # Find the market
@@ -46,7 +63,7 @@ class CoinDCXAPI:
             
             # Try alternative format
             url = f"{self.base_url}/market_data/current_prices"
-            response = requests.get(url, timeout=10)
+            response = self._get('coindcx', 'current_prices', url)
             data = response.json()
             
             # Search in prices
@@ -61,6 +78,51 @@ class CoinDCXAPI:
             print(f"❌ Error fetching price: {e}")
             return self._get_price_backup(symbol)
     
+    def get_price_range(self, symbol: str, since_ms: int,
+                        until_ms: Optional[int] = None) -> Tuple[Optional[float], Optional[float]]:
+        """Get (high, low) traded between `since_ms` and `until_ms` (epoch ms; default now)"""
+        pair = self._get_pair(symbol)
+        if until_ms is None:
+            until_ms = int(time.time() * 1000)
+        
+        try:
+            # Recent trades give the exact range for short windows
+            url = f"{self.public_url}/market_data/trade_history"
+            response = self._get('coindcx', 'trade_history', url, params={'pair': pair, 'limit': 500})
+            trades = response.json()
+            
+            prices = [float(t['p']) for t in trades if since_ms <= t.get('T', 0) <= until_ms]
+            covered = bool(trades) and min(t.get('T', 0) for t in trades) <= since_ms
+            if prices and covered:
+                return max(prices), min(prices)
+            
+            # Busy market: the window is longer than the trade history, use 1m candles.
+            # Only minutes opening at or after since_ms count; a partial first
+            # minute holds older prices and is left to the trades above (or the
+            # last price when there are none)
+            url = f"{self.public_url}/market_data/candles"
+            params = {
+                'pair': pair,
+                'interval': '1m',
+                'startTime': since_ms + (-since_ms % 60000),
+                'endTime': until_ms,
+            }
+            response = self._get('coindcx', 'candles', url, params=params)
+            candles = [c for c in response.json() if c.get('time', 0) >= since_ms]
+            
+            if candles:
+                highs = [float(c['high']) for c in candles] + prices
+                lows = [float(c['low']) for c in candles] + prices
+                return max(highs), min(lows)
+            
+            if prices:
+                return max(prices), min(prices)
+            
+        except Exception as e:
+            print(f"❌ Range fetch error for {symbol}: {e}")
+        
+        return None, None
+    
     def _get_price_backup(self, symbol: str) -> float:
         """Backup price source using CoinGecko"""
         try:
@@ -82,8 +144,8 @@ class CoinDCXAPI:
             
             coin_id = coin_id_map.get(coin, coin)
             
-            url = f"https://api.coingecko.com/api/v3/simple/price?ids={coin_id}&vs_currencies=usd"
-            response = requests.get(url, timeout=10)
+            url = f"{self.coingecko_url}/simple/price?ids={coin_id}&vs_currencies=usd"
+            response = self._get('coingecko', 'simple_price', url)
             data = response.json()
             
             if coin_id in data:
@@ -105,6 +167,11 @@ class CoinDCXAPI:
         coin = symbol.replace('USDT', '')
         return f"{coin}USDT"
     
+    def _get_pair(self, symbol: str) -> str:
+        """Convert symbol to CoinDCX public market data pair (SEIUSDT -> B-SEI_USDT)"""
+        coin = symbol.replace('USDT', '')
+        return f"B-{coin}_USDT"
+    
     def get_balance(self) -> Dict:
         """Get account balance (requires API key)"""
         if not self.api_key or not self.secret:
@@ -7,12 +7,22 @@ load_dotenv()
 # ========== TELEGRAM ==========
 BOT_TOKEN = os.getenv('BOT_TOKEN')
 CHAT_ID = os.getenv('CHAT_ID')
+# Bot API host; point at fake_servers.py for offline load tests
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org').rstrip('/')
+TELEGRAM_BOT_URL = f"{TELEGRAM_API_URL}/bot"
+TELEGRAM_FILE_URL = f"{TELEGRAM_API_URL}/file/bot"
 
 # ========== COINDCX API ==========
 COINDCX_API_KEY = os.getenv('COINDCX_API_KEY', '')
 COINDCX_SECRET = os.getenv('COINDCX_SECRET', '')
 USE_PUBLIC_API = os.getenv('USE_PUBLIC_API', 'true').lower() == 'true'
 
+# ========== PRICE APIS ==========
+# Overridable so the bot can run against fake_servers.py
+COINDCX_BASE_URL = os.getenv('COINDCX_BASE_URL', 'https://api.coindcx.com').rstrip('/')
+COINDCX_PUBLIC_URL = os.getenv('COINDCX_PUBLIC_URL', 'https://public.coindcx.com').rstrip('/')
+COINGECKO_BASE_URL = os.getenv('COINGECKO_BASE_URL', 'https://api.coingecko.com/api/v3').rstrip('/')
+
 # ========== RAILWAY ==========
 PORT = int(os.getenv('PORT', '8080'))
 RAILWAY_PUBLIC_DOMAIN = os.getenv('RAILWAY_PUBLIC_DOMAIN')
@@ -20,8 +30,21 @@ WEBHOOK_URL = None
 if RAILWAY_PUBLIC_DOMAIN:
     WEBHOOK_URL = f"https://{RAILWAY_PUBLIC_DOMAIN}/webhook/{BOT_TOKEN}"
 
+# Webhook updates are acknowledged at once and processed by a worker pool
+WEBHOOK = {
+    'WORKERS': int(os.getenv('WEBHOOK_WORKERS', '4')),
+    'QUEUE_SIZE': int(os.getenv('WEBHOOK_QUEUE_SIZE', '1000')),
+    'DEDUP_SIZE': 5000,         # recent update_ids remembered for redeliveries
+}
+# Optional: Telegram sends it back in X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+
 # ========== SETTINGS ==========
-CHECK_INTERVAL = 10
+CHECK_INTERVAL = int(os.getenv('CHECK_INTERVAL', '10'))
+
+# Evaluate TP/SL/entry against the high/low traded since the previous poll,
+# so spikes between polls are not missed and CHECK_INTERVAL can be longer
+USE_PRICE_RANGE = os.getenv('USE_PRICE_RANGE', 'true').lower() == 'true'
 
 TP_STRATEGY = {
     'TP1_PERCENT': 30,
@@ -42,12 +65,91 @@ ALERT_THRESHOLDS = {
     'RAPID_MOVE': 0.01,
 }
 
+# Language of alert messages: 'bn' (Bengali) or 'en' (English)
+ALERT_LOCALE = os.getenv('ALERT_LOCALE', 'bn')
+
+# Severity of each alert type, used by subscriber filters
+ALERT_SEVERITY_LEVELS = ['INFO', 'WARNING', 'CRITICAL']
+ALERT_SEVERITY = {
+    'TP1_APPROACH': 'INFO',
+    'TP2_APPROACH': 'INFO',
+    'TP3_APPROACH': 'INFO',
+    'TIME_30MIN': 'INFO',
+    'TP2_MISSED': 'WARNING',
+    'TP3_MISSED': 'WARNING',
+    'DANGER_50': 'WARNING',
+    'WARNING_1PCT': 'WARNING',
+    'NEAR_BE': 'WARNING',
+    'BE_REJECT': 'WARNING',
+    'RAPID_MOVE': 'WARNING',
+    # everything else (entry, hits, SL moves, SL, critical, expiry) is CRITICAL
+}
+# Muted together by a subscriber's "danger off" setting
+DANGER_ALERTS = ['CRITICAL_25', 'DANGER_50', 'WARNING_1PCT', 'NEAR_BE', 'LIQUIDATION', 'BE_REJECT', 'RAPID_MOVE']
+
 COOLDOWNS = {
     'DEFAULT': 60,
     'RAPID': 300,
     'TIME': 1800,
 }
 
+# Telegram Bot API limits used by the alert outbox
+TELEGRAM_LIMITS = {
+    'GLOBAL_PER_SECOND': 30,
+    'CHAT_PER_SECOND': 1,
+    'GROUP_PER_MINUTE': 20,
+    'COALESCE_WINDOW': 2.0,     # seconds to merge alerts of the same trade
+    'MAX_MESSAGE_LENGTH': 4096,
+    'MAX_RETRIES': 5,
+}
+
+# Alert delivery pipeline: bounded queue drained by sender workers
+ALERT_DELIVERY = {
+    'WORKERS': int(os.getenv('ALERT_SENDER_WORKERS', '4')),
+    'QUEUE_SIZE': int(os.getenv('ALERT_QUEUE_SIZE', '500')),
+    'RETRY_BASE': 5,            # seconds; doubled after every failed attempt
+    'RETRY_MAX': 600,
+}
+
+# Many signals in one message or an uploaded .txt/.csv document
+BULK_IMPORT = {
+    'MAX_SIGNALS': 1000,
+    'MAX_FILE_BYTES': 1_000_000,
+    'MAX_ERRORS_SHOWN': 10,
+}
+
+# Recently parsed signals kept to reject forwarded duplicates without parsing
+SIGNAL_CACHE_SIZE = 2048
+
+# Alert subscribers (chats); CHAT_ID is subscribed on first start
+SUBSCRIBERS_FILE = 'subscribers.json'
+
+# Live dashboard: one pinned message per chat, edited in place (/dashboard)
+DASHBOARD = {
+    'REFRESH_INTERVAL': float(os.getenv('DASHBOARD_INTERVAL', '15')),   # min seconds between edits
+    'FILE': 'dashboard.json',
+    # Informational alerts shown only on the dashboard in chats that have one
+    'QUIET_ALERTS': [
+        'TP1_APPROACH', 'TP2_APPROACH', 'TP3_APPROACH',
+        'WARNING_1PCT', 'NEAR_BE', 'RAPID_MOVE', 'TIME_30MIN',
+    ] if os.getenv('DASHBOARD_QUIET', 'true').lower() == 'true' else [],
+}
+
+# ========== HEALTH ==========
+# Event-loop watchdog and the /health check (503 makes Railway restart us)
+WATCHDOG = {
+    'INTERVAL': 0.5,                # seconds between loop heartbeats
+    'BLOCK_THRESHOLD': float(os.getenv('LOOP_BLOCK_THRESHOLD', '1.0')),   # stack dump after this stall
+    # No completed monitor cycle for this long means the monitor is stuck
+    'STALE_AFTER': float(os.getenv('HEALTH_STALE_AFTER', str(max(120, CHECK_INTERVAL * 6)))),
+}
+
+# ========== PROFILING ==========
+# Per-rule counters/timings in AlertManager; snapshots are written to
+# PROFILE_FILE after every monitor cycle when it is set
+PROFILE_ALERTS = os.getenv('PROFILE_ALERTS', 'false').lower() == 'true'
+PROFILE_FILE = os.getenv('PROFILE_FILE', '')
+
 def validate_config():
     missing = []
     if not BOT_TOKEN:
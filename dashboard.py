@@ -0,0 +1,179 @@
+# dashboard.py
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+from telegram import Bot
+from telegram.error import BadRequest, RetryAfter
+from database import TradeDatabase, Trade
+from config import DASHBOARD, CHAT_ID
+from clock import Clock, real_clock
+from telegram_outbox import RateLimiter
+
+STATUS_ICONS = {
+    'PENDING': '⏳',
+    'ACTIVE': '🟢',
+    'TP1': '🥇',
+    'TP2': '🥈',
+    'TP3': '🥉',
+}
+
+
+class Dashboard:
+    """One pinned message per chat, edited in place with every active trade
+
+    A chat sees the trades it owns; the operator chat (CHAT_ID) sees every
+    tenant's. Edits are throttled to one per REFRESH_INTERVAL and only sent
+    when the rendered content changed. Message ids are kept in dashboard.json so a
+    restart keeps editing the same message.
+    """
+
+    def __init__(self, bot: Bot, db: TradeDatabase, filename: str = DASHBOARD['FILE'],
+                 interval: float = DASHBOARD['REFRESH_INTERVAL'], clock: Optional[Clock] = None,
+                 limiter: Optional[RateLimiter] = None):
+        self.bot = bot
+        self.clock = clock or real_clock
+        # Shared with the alert outbox and command replies: one budget for all sends
+        self.limiter = limiter or RateLimiter(clock=self.clock)
+        self.db = db
+        self.filename = filename
+        self.interval = interval
+        self.messages: Dict[str, int] = {}      # chat_id -> message_id
+        self.last_hash: Dict[str, str] = {}
+        self.blocked_until = 0.0
+        self.running = False
+        self.stats = {'edits': 0, 'skipped': 0, 'errors': 0}
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.filename):
+            try:
+                with open(self.filename, 'r') as f:
+                    self.messages = {str(k): v for k, v in json.load(f).items()}
+            except Exception as e:
+                print(f"Error loading dashboard: {e}")
+
+    def save(self):
+        try:
+            with open(self.filename, 'w') as f:
+                json.dump(self.messages, f, indent=2)
+        except Exception as e:
+            print(f"Error saving dashboard: {e}")
+
+    def is_active(self, chat_id) -> bool:
+        return str(chat_id) in self.messages
+
+    async def open(self, chat_id) -> int:
+        """Send and pin a fresh dashboard message for this chat"""
+        body = self.render_body(chat_id)
+        message = await self.limiter.call(chat_id, self.bot.send_message, chat_id=chat_id,
+                                          text=self._with_footer(body), parse_mode='HTML')
+        try:
+            await self.bot.pin_chat_message(chat_id=chat_id, message_id=message.message_id,
+                                            disable_notification=True)
+        except Exception as e:
+            print(f"⚠️ Could not pin dashboard in {chat_id}: {e}")
+
+        self.messages[str(chat_id)] = message.message_id
+        self.last_hash[str(chat_id)] = self._hash(body)
+        self.save()
+        return message.message_id
+
+    async def close(self, chat_id):
+        message_id = self.messages.pop(str(chat_id), None)
+        self.last_hash.pop(str(chat_id), None)
+        self.save()
+        if message_id:
+            try:
+                await self.bot.unpin_chat_message(chat_id=chat_id, message_id=message_id)
+            except Exception:
+                pass
+
+    # ============ RENDERING ============
+
+    def render_body(self, chat_id) -> str:
+        """Dashboard content of one chat without the timestamp footer"""
+        owner = None if str(chat_id) == str(CHAT_ID) else str(chat_id)
+        active = self.db.get_active(owner)
+        if not active:
+            return "📌 <b>লাইভ ড্যাশবোর্ড</b>\n\nকোনো অ্যাক্টিভ ট্রেড নেই।"
+
+        lines = [f"📌 <b>লাইভ ড্যাশবোর্ড</b> ({len(active)})", ""]
+        for trade in active:
+            lines.extend(self._trade_lines(trade))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _trade_lines(trade: Trade) -> list:
+        emoji = "🟢" if trade.direction == "LONG" else "🔴"
+        icon = STATUS_ICONS.get(trade.status, '⚪')
+        price = trade.price_history[-1]['price'] if trade.price_history else None
+        next_tp = trade.current_tp
+        sl = trade.current_sl if trade.current_sl is not None else trade.stop_loss
+
+        return [
+            f"{emoji} <b>{trade.pair}</b> {trade.direction} | {icon} {trade.status}",
+            f"   প্রাইস: {f'${price:.6f}' if price else '—'} | SL: ${sl:.6f}",
+            f"   Next TP: {f'${next_tp:.6f}' if next_tp else 'ডন'}",
+            "",
+        ]
+
+    def _with_footer(self, body: str) -> str:
+        return f"{body}\n🕐 {self.clock.utcnow().strftime('%H:%M:%S')} UTC"
+
+    @staticmethod
+    def _hash(body: str) -> str:
+        return hashlib.blake2b(body.encode(), digest_size=16).hexdigest()
+
+    # ============ UPDATES ============
+
+    async def refresh(self):
+        """Edit every dashboard whose visible content changed"""
+        if not self.messages or self.clock.monotonic() < self.blocked_until:
+            return
+
+        for chat_id, message_id in list(self.messages.items()):
+            body = self.render_body(chat_id)
+            digest = self._hash(body)
+            text = self._with_footer(body)
+            if self.last_hash.get(chat_id) == digest:
+                self.stats['skipped'] += 1
+                continue
+            try:
+                await self.limiter.acquire(chat_id)
+                await self.bot.edit_message_text(chat_id=chat_id, message_id=message_id,
+                                                 text=text, parse_mode='HTML')
+                self.last_hash[chat_id] = digest
+                self.stats['edits'] += 1
+            except RetryAfter as e:
+                retry_after = getattr(e.retry_after, 'total_seconds', lambda: e.retry_after)()
+                print(f"⏳ Dashboard 429, pausing {retry_after}s")
+                self.limiter.penalize(chat_id, retry_after)
+                self.blocked_until = self.clock.monotonic() + retry_after
+                return
+            except BadRequest as e:
+                if 'not modified' in str(e).lower():
+                    self.last_hash[chat_id] = digest
+                elif 'not found' in str(e).lower():
+                    # Deleted by the user: stop tracking it
+                    print(f"⚠️ Dashboard message gone in {chat_id}")
+                    self.messages.pop(chat_id, None)
+                    self.save()
+                else:
+                    self.stats['errors'] += 1
+                    print(f"❌ Dashboard edit error: {e}")
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"❌ Dashboard edit error: {e}")
+
+    async def run(self):
+        self.running = True
+        while self.running:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"❌ Dashboard error: {e}")
+            await self.clock.async_sleep(self.interval)
+
+    def stop(self):
+        self.running = False
@@ -1,9 +1,13 @@
 # database.py
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional
 import json
 import os
+import time
+from config import CHAT_ID
+from clock import real_clock
+from metrics import DB_SAVE
 
 @dataclass
 class Trade:
@@ -36,6 +40,10 @@ class Trade:
     entry_price: Optional[float] = None
     alerts_sent: List[str] = field(default_factory=list)
     price_history: List[dict] = field(default_factory=list)
+    # Rendered alerts not yet delivered; saved together with the trade state
+    outbox: List[dict] = field(default_factory=list)
+    # Chat that sent the signal; trades from before tenants belong to CHAT_ID
+    owner_chat: Optional[str] = None
     
     @property
     def entry_avg(self) -> float:
@@ -55,11 +63,16 @@ class Trade:
             return self.tp3
         return None
     
+    def state_key(self) -> tuple:
+        """Fields shown in /status and /history; a change invalidates cached views"""
+        return (self.status, self.current_sl, self.tp1_hit, self.tp2_hit, self.tp3_hit,
+                self.tp1_closed_percent, self.tp2_closed_percent, self.tp3_closed_percent)
+    
     def get_remaining_position(self) -> float:
         return 100 - self.tp1_closed_percent - self.tp2_closed_percent - self.tp3_closed_percent
     
-    def is_expired(self) -> bool:
-        return datetime.utcnow() > self.expiry_time
+    def is_expired(self, now: Optional[datetime] = None) -> bool:
+        return (now or real_clock.utcnow()) > self.expiry_time
     
     def to_dict(self):
         return {
@@ -89,6 +102,8 @@ class Trade:
             'entry_price': self.entry_price,
             'alerts_sent': self.alerts_sent,
             'price_history': self.price_history,
+            'outbox': self.outbox,
+            'owner_chat': self.owner_chat,
         }
     
     @classmethod
@@ -99,13 +114,21 @@ class Trade:
 
 
 class TradeDatabase:
-    def __init__(self, filename="trades.json"):
+    def __init__(self, filename: Optional[str] = "trades.json"):
+        # None keeps the trades in memory only (replays)
         self.filename = filename
         self.trades: List[Trade] = []
+        # Bumped whenever a trade is added or its visible state changes
+        self.version = 0
+        self.owner_versions: Dict[str, int] = {}
+        self.state_keys: Dict[str, tuple] = {}
+        # Per-tenant indexes
+        self.by_owner: Dict[str, List[Trade]] = {}
+        self.active_by_pair: Dict[tuple, Trade] = {}     # (owner, pair) -> active trade
         self.load()
     
     def load(self):
-        if os.path.exists(self.filename):
+        if self.filename and os.path.exists(self.filename):
             try:
                 with open(self.filename, 'r') as f:
                     data = json.load(f)
@@ -113,22 +136,72 @@ class TradeDatabase:
             except Exception as e:
                 print(f"Error loading database: {e}")
                 self.trades = []
+        
+        for trade in self.trades:
+            self._index(trade)
     
     def save(self):
+        if not self.filename:
+            return
+        started = time.perf_counter()
         try:
-            with open(self.filename, 'w') as f:
+            # Write-then-rename so a crash never leaves a half-written file
+            tmp = f"{self.filename}.tmp"
+            with open(tmp, 'w') as f:
                 json.dump([t.to_dict() for t in self.trades], f, indent=2)
+            os.replace(tmp, self.filename)
         except Exception as e:
             print(f"Error saving database: {e}")
+        DB_SAVE.observe(time.perf_counter() - started)
     
     def add(self, trade: Trade):
         self.trades.append(trade)
+        self._index(trade)
         self.save()
     
-    def get_active(self) -> List[Trade]:
-        return [t for t in self.trades if t.status not in ['CLOSED', 'EXPIRED']]
+    def add_many(self, trades: List[Trade]):
+        """Insert a batch with a single save"""
+        for trade in trades:
+            self.trades.append(trade)
+            self._index(trade)
+        self.save()
     
-    def get_by_pair(self, pair: str) -> Optional[Trade]:
+    def _index(self, trade: Trade):
+        trade.owner_chat = trade.owner_chat or str(CHAT_ID)
+        self.by_owner.setdefault(trade.owner_chat, []).append(trade)
+        self._touch(trade)
+    
+    def _touch(self, trade: Trade):
+        key = trade.state_key()
+        if self.state_keys.get(trade.id) == key:
+            return
+        self.state_keys[trade.id] = key
+        self.version += 1
+        owner = trade.owner_chat
+        self.owner_versions[owner] = self.owner_versions.get(owner, 0) + 1
+        
+        index_key = (owner, trade.pair)
+        if trade.status not in ['CLOSED', 'EXPIRED']:
+            self.active_by_pair[index_key] = trade
+        elif self.active_by_pair.get(index_key) is trade:
+            del self.active_by_pair[index_key]
+    
+    def owner_version(self, owner: str) -> int:
+        return self.owner_versions.get(str(owner), 0)
+    
+    def _trades_of(self, owner: Optional[str]) -> List[Trade]:
+        return self.trades if owner is None else self.by_owner.get(str(owner), [])
+    
+    def get_active(self, owner: Optional[str] = None) -> List[Trade]:
+        return [t for t in self._trades_of(owner) if t.status not in ['CLOSED', 'EXPIRED']]
+    
+    def get_by_pair(self, pair: str, owner: Optional[str] = None) -> Optional[Trade]:
+        if owner is not None:
+            trade = self.active_by_pair.get((str(owner), pair))
+            # Status may have changed in place since the last update()
+            if trade and trade.status not in ['CLOSED', 'EXPIRED']:
+                return trade
+            return None
         for t in self.trades:
             if t.pair == pair and t.status not in ['CLOSED', 'EXPIRED']:
                 return t
@@ -137,15 +210,25 @@ class TradeDatabase:
     def update(self, trade: Trade):
         for i, t in enumerate(self.trades):
             if t.id == trade.id:
+                if t is not trade:
+                    trade.owner_chat = t.owner_chat
+                    owned = self.by_owner[t.owner_chat]
+                    owned[owned.index(t)] = trade
                 self.trades[i] = trade
+                self._touch(trade)
                 self.save()
                 return
     
-    def close_all(self, pair: str):
-        for t in self.trades:
+    def close_all(self, pair: str, owner: Optional[str] = None):
+        for t in self._trades_of(owner):
             if t.pair == pair:
                 t.status = 'CLOSED'
+                self._touch(t)
         self.save()
     
-    def get_closed(self) -> List[Trade]:
-        return [t for t in self.trades if t.status in ['CLOSED', 'EXPIRED']]
+    def get_pending_alerts(self) -> List[tuple]:
+        """(trade, alert) pairs still waiting for delivery"""
+        return [(t, a) for t in self.trades for a in t.outbox]
+    
+    def get_closed(self, owner: Optional[str] = None) -> List[Trade]:
+        return [t for t in self._trades_of(owner) if t.status in ['CLOSED', 'EXPIRED']]
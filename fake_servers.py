@@ -0,0 +1,426 @@
+# fake_servers.py
+"""Local stand-ins for CoinDCX, CoinGecko and the Telegram Bot API
+
+    python fake_servers.py [--port 9000] [--latency 50] [--error-rate 0.01] [--candles data/]
+
+One aiohttp server answers all three APIs; start the bot against it with
+
+    COINDCX_BASE_URL=http://127.0.0.1:9000 COINDCX_PUBLIC_URL=http://127.0.0.1:9000 \\
+    COINGECKO_BASE_URL=http://127.0.0.1:9000/api/v3 TELEGRAM_API_URL=http://127.0.0.1:9000
+
+Prices are a random walk per symbol, or replayed from backtest candle files
+(--candles, --speed candle seconds per second). Every API request can get
+latency, random 500s and 429s from token buckets: --exchange-rate for the
+price APIs and Telegram's global/per-chat send limits for sendMessage.
+
+Test hooks (never delayed or failed):
+    POST /fake/updates      queue a Telegram update for getUpdates
+    GET  /fake/messages     messages the bot sent (?since=<index>)
+    GET  /fake/stats        request, error and rate-limit counters
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+from aiohttp import web
+
+DEFAULT_PRICES = {
+    'BTCUSDT': 60000.0,
+    'ETHUSDT': 3000.0,
+    'SOLUSDT': 150.0,
+    'BNBUSDT': 550.0,
+    'SEIUSDT': 0.45,
+    'TIAUSDT': 8.0,
+    'ADAUSDT': 0.45,
+    'DOTUSDT': 7.0,
+    'LINKUSDT': 15.0,
+    'UNIUSDT': 8.0,
+}
+
+# CoinGecko ids used by coindcx_api.py and main.py
+COINGECKO_IDS = {
+    'sei-network': 'SEIUSDT',
+    'bitcoin': 'BTCUSDT',
+    'ethereum': 'ETHUSDT',
+    'solana': 'SOLUSDT',
+    'celestia': 'TIAUSDT',
+    'binancecoin': 'BNBUSDT',
+    'cardano': 'ADAUSDT',
+    'polkadot': 'DOTUSDT',
+    'chainlink': 'LINKUSDT',
+    'uniswap': 'UNIUSDT',
+}
+
+HISTORY_SIZE = 5000     # trades kept per symbol for trade_history / candles
+
+
+@dataclass
+class FaultConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0             # share of requests answered with a 500
+    exchange_rate: float = 0.0          # CoinDCX/CoinGecko requests per second, 0 = unlimited
+    telegram_rate: float = 30.0         # sendMessage per second over all chats, 0 = unlimited
+    chat_rate: float = 1.0              # sendMessage per second per chat, 0 = unlimited
+    retry_after: int = 1                # seconds announced with a 429
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        if not self.rate:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+# ========== PRICES ==========
+
+class PriceFeed:
+    """Random-walk prices per symbol, stepped every `tick` seconds"""
+
+    def __init__(self, volatility: float = 0.002, tick: float = 1.0, seed: Optional[int] = None):
+        self.volatility = volatility
+        self.tick = tick
+        self.rng = random.Random(seed)
+        self.prices: Dict[str, float] = dict(DEFAULT_PRICES)
+        self.history: Dict[str, Deque[Tuple[int, float]]] = {}
+
+    def price(self, symbol: str) -> float:
+        symbol = symbol.upper()
+        if symbol not in self.prices:
+            self.prices[symbol] = 1.0
+        return self.prices[symbol]
+
+    def next_price(self, symbol: str, price: float) -> float:
+        return price * (1 + self.rng.gauss(0, self.volatility))
+
+    def step(self):
+        now_ms = int(time.time() * 1000)
+        for symbol, price in list(self.prices.items()):
+            price = self.next_price(symbol, price)
+            self.prices[symbol] = price
+            self.history.setdefault(symbol, deque(maxlen=HISTORY_SIZE)).append((now_ms, price))
+
+    async def run(self):
+        while True:
+            self.step()
+            await asyncio.sleep(self.tick)
+
+
+class CandleFeed(PriceFeed):
+    """Prices replayed from backtest candle files, `speed` candle seconds per second"""
+
+    def __init__(self, candle_dir: str, speed: float = 60.0, tick: float = 1.0):
+        super().__init__(tick=tick)
+        # backtest sets the bot settings config.py needs before importing it
+        from backtest import load_candles
+        self.speed = speed
+        self.started = time.monotonic()
+        self.candles = {}
+        self.positions: Dict[str, int] = {}
+        for name in os.listdir(candle_dir):
+            if name.endswith('.csv'):
+                candles = load_candles(os.path.join(candle_dir, name))
+                if candles:
+                    self.candles[name[:-4].upper()] = candles
+        self.prices = {symbol: candles[0][4] for symbol, candles in self.candles.items()}
+
+    def next_price(self, symbol: str, price: float) -> float:
+        candles = self.candles.get(symbol)
+        if not candles:
+            return price
+        offset = (time.monotonic() - self.started) * self.speed
+        first = candles[0][0]
+        # Candles are sorted; walk forward from the last position
+        index = self.positions.get(symbol, 0)
+        while index + 1 < len(candles) and (candles[index + 1][0] - first).total_seconds() <= offset:
+            index += 1
+        self.positions[symbol] = index
+        return candles[index][4]
+
+
+def coindcx_symbol(pair: str) -> str:
+    """B-SEI_USDT -> SEIUSDT"""
+    return pair.split('-', 1)[-1].replace('_', '').upper()
+
+
+# ========== SERVER ==========
+
+class FakeServers:
+    def __init__(self, feed: Optional[PriceFeed] = None, faults: Optional[FaultConfig] = None,
+                 seed: Optional[int] = None):
+        self.feed = feed or PriceFeed(seed=seed)
+        self.faults = faults or FaultConfig()
+        self.rng = random.Random(seed)
+        self.exchange_bucket = TokenBucket(self.faults.exchange_rate)
+        self.telegram_bucket = TokenBucket(self.faults.telegram_rate)
+        self.chat_buckets: Dict[str, TokenBucket] = {}
+        self.stats = Counter()
+        self.messages: List[dict] = []
+        self.updates: Deque[dict] = deque()
+        self.update_id = 0
+        self.new_update = asyncio.Event()
+        self.message_id = 0
+
+    def make_app(self) -> web.Application:
+        app = web.Application(middlewares=[self.faults_middleware])
+        app.router.add_get('/exchange/ticker', self.ticker)
+        app.router.add_get('/market_data/current_prices', self.current_prices)
+        app.router.add_get('/market_data/trade_history', self.trade_history)
+        app.router.add_get('/market_data/candles', self.candles)
+        app.router.add_post('/exchange/v1/users/balances', self.balances)
+        app.router.add_get('/api/v3/simple/price', self.coingecko_price)
+        app.router.add_route('*', '/bot{token}/{method}', self.telegram)
+        app.router.add_post('/fake/updates', self.push_update)
+        app.router.add_get('/fake/messages', self.sent_messages)
+        app.router.add_get('/fake/stats', self.get_stats)
+        app.on_startup.append(self._start_feed)
+        app.on_cleanup.append(self._stop_feed)
+        return app
+
+    async def _start_feed(self, app: web.Application):
+        self.feed.step()
+        app['feed_task'] = asyncio.create_task(self.feed.run())
+
+    async def _stop_feed(self, app: web.Application):
+        app['feed_task'].cancel()
+
+    # ============ FAULTS ============
+
+    @web.middleware
+    async def faults_middleware(self, request: web.Request, handler):
+        path = request.path
+        if path.startswith('/fake/'):
+            return await handler(request)
+        service = 'telegram' if path.startswith('/bot') else 'coingecko' if path.startswith('/api/') else 'coindcx'
+        self.stats[f'{service}_requests'] += 1
+
+        faults = self.faults
+        if faults.latency_ms or faults.jitter_ms:
+            delay = max(0.0, self.rng.gauss(faults.latency_ms, faults.jitter_ms))
+            await asyncio.sleep(delay / 1000)
+        if faults.error_rate and self.rng.random() < faults.error_rate:
+            self.stats[f'{service}_errors'] += 1
+            if service == 'telegram':
+                return web.json_response({'ok': False, 'error_code': 500,
+                                          'description': 'Internal Server Error'}, status=500)
+            return web.json_response({'message': 'Internal Server Error'}, status=500)
+        if service != 'telegram' and not self.exchange_bucket.take():
+            self.stats[f'{service}_429'] += 1
+            return web.json_response({'message': 'Too many requests'}, status=429,
+                                     headers={'Retry-After': str(faults.retry_after)})
+        return await handler(request)
+
+    # ============ COINDCX ============
+
+    async def ticker(self, request: web.Request) -> web.Response:
+        now = int(time.time())
+        return web.json_response([
+            {'market': symbol, 'last_price': str(price), 'timestamp': now}
+            for symbol, price in self.feed.prices.items()
+        ])
+
+    async def current_prices(self, request: web.Request) -> web.Response:
+        return web.json_response({symbol: price for symbol, price in self.feed.prices.items()})
+
+    async def trade_history(self, request: web.Request) -> web.Response:
+        symbol = coindcx_symbol(request.query.get('pair', ''))
+        self.feed.price(symbol)
+        limit = int(request.query.get('limit', 30))
+        history = list(self.feed.history.get(symbol, ()))[-limit:]
+        # Newest first, like the real endpoint
+        return web.json_response([{'p': price, 'q': 1.0, 'T': ms, 's': symbol} for ms, price in reversed(history)])
+
+    async def candles(self, request: web.Request) -> web.Response:
+        symbol = coindcx_symbol(request.query.get('pair', ''))
+        start = int(request.query.get('startTime', 0))
+        end = int(request.query.get('endTime', time.time() * 1000))
+        buckets: Dict[int, List[float]] = {}
+        for ms, price in self.feed.history.get(symbol, ()):
+            if start <= ms <= end:
+                buckets.setdefault(ms - ms % 60000, []).append(price)
+        return web.json_response([
+            {'open': prices[0], 'high': max(prices), 'low': min(prices), 'close': prices[-1],
+             'volume': len(prices), 'time': minute}
+            for minute, prices in sorted(buckets.items(), reverse=True)
+        ])
+
+    async def balances(self, request: web.Request) -> web.Response:
+        return web.json_response([])
+
+    # ============ COINGECKO ============
+
+    async def coingecko_price(self, request: web.Request) -> web.Response:
+        result = {}
+        for coin_id in request.query.get('ids', '').split(','):
+            if coin_id:
+                symbol = COINGECKO_IDS.get(coin_id, f"{coin_id.upper()}USDT")
+                result[coin_id] = {'usd': self.feed.price(symbol)}
+        return web.json_response(result)
+
+    # ============ TELEGRAM ============
+
+    async def telegram(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        if request.content_type == 'application/json':
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+        self.stats[f'telegram_{method}'] += 1
+
+        if method == 'getMe':
+            return self._ok({'id': 1, 'is_bot': True, 'first_name': 'Fake', 'username': 'fake_bot',
+                             'can_join_groups': True, 'can_read_all_group_messages': False,
+                             'supports_inline_queries': False})
+        if method == 'getUpdates':
+            return self._ok(await self._get_updates(params))
+        if method in ('sendMessage', 'editMessageText'):
+            return self._send(method, params)
+        if method == 'getWebhookInfo':
+            return self._ok({'url': '', 'has_custom_certificate': False, 'pending_update_count': 0})
+        # setWebhook, deleteWebhook, pin/unpin, answerCallbackQuery, ...
+        return self._ok(True)
+
+    @staticmethod
+    def _ok(result) -> web.Response:
+        return web.json_response({'ok': True, 'result': result})
+
+    def _send(self, method: str, params: dict) -> web.Response:
+        chat_id = str(params.get('chat_id', ''))
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.faults.chat_rate)
+        if not bucket.take() or not self.telegram_bucket.take():
+            self.stats['telegram_429'] += 1
+            retry_after = self.faults.retry_after
+            return web.json_response({
+                'ok': False, 'error_code': 429,
+                'description': f'Too Many Requests: retry after {retry_after}',
+                'parameters': {'retry_after': retry_after},
+            }, status=429)
+
+        if method == 'sendMessage':
+            self.message_id += 1
+            message_id = self.message_id
+        else:
+            message_id = int(params.get('message_id', 0))
+        self.messages.append({'method': method, 'chat_id': chat_id, 'message_id': message_id,
+                              'text': params.get('text', ''), 'time': time.time()})
+        try:
+            chat = int(chat_id)
+        except ValueError:
+            chat = 0
+        return self._ok({'message_id': message_id, 'date': int(time.time()),
+                         'chat': {'id': chat, 'type': 'group' if chat < 0 else 'private'},
+                         'from': {'id': 1, 'is_bot': True, 'first_name': 'Fake'},
+                         'text': params.get('text', '')})
+
+    async def _get_updates(self, params: dict) -> list:
+        offset = int(params.get('offset') or 0)
+        while self.updates and self.updates[0]['update_id'] < offset:
+            self.updates.popleft()
+        if not self.updates:
+            self.new_update.clear()
+            try:
+                await asyncio.wait_for(self.new_update.wait(), timeout=min(float(params.get('timeout') or 0), 10))
+            except asyncio.TimeoutError:
+                pass
+        return list(self.updates)[:int(params.get('limit') or 100)]
+
+    # ============ TEST HOOKS ============
+
+    async def push_update(self, request: web.Request) -> web.Response:
+        update = await request.json()
+        self.update_id += 1
+        update.setdefault('update_id', self.update_id)
+        self.updates.append(update)
+        self.new_update.set()
+        return web.json_response({'update_id': update['update_id']})
+
+    async def sent_messages(self, request: web.Request) -> web.Response:
+        since = int(request.query.get('since', 0))
+        return web.json_response({'next': len(self.messages), 'messages': self.messages[since:]})
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            **self.stats,
+            'messages': len(self.messages),
+            'chats': len(self.chat_buckets),
+            'pending_updates': len(self.updates),
+        })
+
+
+async def start(host: str = '127.0.0.1', port: int = 9000, **kwargs) -> Tuple[FakeServers, web.AppRunner]:
+    """Start the fake servers in the running loop; stop with `await runner.cleanup()`"""
+    servers = FakeServers(**kwargs)
+    runner = web.AppRunner(servers.make_app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return servers, runner
+
+
+def env_for(host: str, port: int) -> Dict[str, str]:
+    """Settings that point the bot at the fake servers"""
+    base = f"http://{host}:{port}"
+    return {
+        'COINDCX_BASE_URL': base,
+        'COINDCX_PUBLIC_URL': base,
+        'COINGECKO_BASE_URL': f"{base}/api/v3",
+        'TELEGRAM_API_URL': base,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake CoinDCX, CoinGecko and Telegram Bot API servers")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--latency', type=float, default=0.0, help="mean latency per request (ms)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="latency standard deviation (ms)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests failing with 500")
+    parser.add_argument('--exchange-rate', type=float, default=0.0, help="price API requests/s before 429s")
+    parser.add_argument('--telegram-rate', type=float, default=30.0, help="sendMessage/s over all chats")
+    parser.add_argument('--chat-rate', type=float, default=1.0, help="sendMessage/s per chat")
+    parser.add_argument('--retry-after', type=int, default=1, help="seconds announced with a 429")
+    parser.add_argument('--volatility', type=float, default=0.002, help="random walk step (fraction)")
+    parser.add_argument('--tick', type=float, default=1.0, help="seconds between price steps")
+    parser.add_argument('--candles', help="replay backtest candle files from this directory")
+    parser.add_argument('--speed', type=float, default=60.0, help="candle seconds per second with --candles")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    if args.candles:
+        feed = CandleFeed(args.candles, args.speed, args.tick)
+    else:
+        feed = PriceFeed(args.volatility, args.tick, args.seed)
+    faults = FaultConfig(args.latency, args.jitter, args.error_rate, args.exchange_rate,
+                         args.telegram_rate, args.chat_rate, args.retry_after)
+
+    async def serve():
+        await start(args.host, args.port, feed=feed, faults=faults, seed=args.seed)
+        print(f"🧪 Fake servers on http://{args.host}:{args.port}")
+        print(" ".join(f"{k}={v}" for k, v in env_for(args.host, args.port).items()))
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+# loadgen.py
+"""Load test: how many trades one process can monitor within CHECK_INTERVAL
+
+    python loadgen.py --signals 200 --pairs 20 [--duration 60] [--json load.json]
+
+Starts fake_servers.py with correlated random-walk prices (one market factor
+shared by all pairs, --correlation), starts the webhook bot against it in
+this process, posts N signals in the real signal format to the webhook (one
+chat per signal unless --chats is given), lets the monitor run for
+--duration seconds and reports:
+
+- webhook ingest: response codes and signals per second
+- monitor cycle time percentiles, against CHECK_INTERVAL
+- alert latency percentiles: price check to Telegram accepting the message
+- memory per trade (tracemalloc; --no-tracemalloc uses the RSS peak instead)
+
+The bot's own output is hidden unless --verbose is given.
+The bot runs in a temporary directory so trades.json etc. are not touched.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from typing import Dict, List, Optional
+
+import aiohttp
+
+import fake_servers
+
+
+class CorrelatedWalkFeed(fake_servers.PriceFeed):
+    """Random walks sharing one market factor: step = vol * (√ρ·market + √(1-ρ)·own)"""
+
+    def __init__(self, prices: Dict[str, float], volatility: float = 0.002,
+                 correlation: float = 0.6, tick: float = 1.0, seed: Optional[int] = None):
+        super().__init__(volatility, tick, seed)
+        self.prices = dict(prices)
+        self.correlation = correlation
+        self.market = 0.0
+
+    def step(self):
+        self.market = self.rng.gauss(0, 1)
+        super().step()
+
+    def next_price(self, symbol: str, price: float) -> float:
+        shock = (math.sqrt(self.correlation) * self.market
+                 + math.sqrt(1 - self.correlation) * self.rng.gauss(0, 1))
+        return price * (1 + self.volatility * shock)
+
+
+def make_pairs(count: int, rng: random.Random) -> Dict[str, float]:
+    return {f"SYN{i:03d}USDT": round(10 ** rng.uniform(-2, 4), 6) for i in range(count)}
+
+
+def percentiles(values: List[float], points=(50, 90, 99)) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {f"p{p}": ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points}
+    result['max'] = ordered[-1]
+    result['count'] = len(ordered)
+    return result
+
+
+def memory_mb() -> float:
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0] / 2 ** 20
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def wait_until(predicate, timeout: float, step: float = 0.1) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        await asyncio.sleep(step)
+    return predicate()
+
+
+async def run_load(args) -> dict:
+    rng = random.Random(args.seed)
+    monitor = None
+    feed = CorrelatedWalkFeed(make_pairs(args.pairs, rng), args.volatility, args.correlation, seed=args.seed)
+    faults = fake_servers.FaultConfig(latency_ms=args.latency, jitter_ms=args.latency / 4,
+                                      error_rate=args.error_rate, telegram_rate=args.telegram_rate)
+    servers, fake_runner = await fake_servers.start(port=args.fake_port, feed=feed, faults=faults)
+
+    # The bot reads its settings at import, so they are set first
+    os.environ.update(fake_servers.env_for('127.0.0.1', args.fake_port))
+    os.environ.update({
+        'BOT_TOKEN': '123456:LOADTEST',
+        'CHAT_ID': str(args.operator_chat),
+        'PORT': str(args.port),
+        'RAILWAY_PUBLIC_DOMAIN': f"127.0.0.1:{args.port}",
+        'CHECK_INTERVAL': str(args.interval),
+    })
+    from benchmark import SIGNAL
+    from config import CHECK_INTERVAL, WEBHOOK_SECRET
+    from telegram_bot import TelegramBot
+
+    bot = TelegramBot()
+    bot_task = asyncio.create_task(bot.run())
+    base = f"http://127.0.0.1:{args.port}"
+    async with aiohttp.ClientSession() as http:
+        async def healthy():
+            try:
+                async with http.get(f"{base}/health") as response:
+                    return response.status < 500
+            except aiohttp.ClientError:
+                return False
+        for _ in range(100):
+            if bot_task.done():
+                # Startup failed (e.g. setWebhook hit an injected error): show why
+                bot_task.result()
+            if await healthy():
+                break
+            await asyncio.sleep(0.1)
+
+        # ---- Ingest ----
+        baseline = memory_mb()
+        headers = {'X-Telegram-Bot-Api-Secret-Token': WEBHOOK_SECRET} if WEBHOOK_SECRET else {}
+        pairs = list(feed.prices)
+        codes: Dict[int, int] = {}
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def post(number: int):
+            pair = pairs[number % len(pairs)]
+            # Jittered so repeated pairs are not answered as duplicate signals
+            price = feed.prices[pair] * (1 + rng.uniform(-0.0005, 0.0005))
+            direction = rng.choice(['LONG', 'SHORT'])
+            side = 1 if direction == 'LONG' else -1
+            text = SIGNAL.format(
+                pair=pair, direction=direction,
+                entry_min=price * 0.999, entry_max=price * 1.001,
+                sl=price * (1 - side * args.sl_pct / 100), tp1=price * (1 + side * args.tp_pct / 100),
+                tp2=price * (1 + side * args.tp_pct * 2 / 100), tp3=price * (1 + side * args.tp_pct * 3 / 100),
+            )
+            chat_id = 100000 + number % (args.chats or args.signals)
+            update = {
+                'update_id': 1000000 + number,
+                'message': {'message_id': number + 1, 'date': int(time.time()),
+                            'chat': {'id': chat_id, 'type': 'private'},
+                            'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Load'},
+                            'text': text},
+            }
+            async with semaphore:
+                async with http.post(f"{base}{bot.webhook_path}", json=update, headers=headers) as response:
+                    codes[response.status] = codes.get(response.status, 0) + 1
+
+        ingest_started = time.perf_counter()
+        await asyncio.gather(*(post(n) for n in range(args.signals)))
+        acked = time.perf_counter() - ingest_started
+        await wait_until(lambda: len(bot.db.trades) >= args.signals, args.ingest_timeout)
+        ingested = time.perf_counter() - ingest_started
+        trades = len(bot.db.trades)
+        after_ingest = memory_mb()
+
+        # ---- Monitoring ----
+        await wait_until(lambda: bot.monitor is not None, 30)
+        monitor = bot.monitor
+        if monitor:
+            monitor.cycle_times.clear()
+            monitor.alert_latency.clear()
+        await asyncio.sleep(args.duration)
+        after_run = memory_mb()
+
+    bot_task.cancel()
+    try:
+        await bot_task
+    except (asyncio.CancelledError, Exception):
+        pass
+    if monitor:
+        monitor.stop()
+    await fake_runner.cleanup()
+
+    cycles = [ns / 1e6 for ns in monitor.cycle_times] if monitor else []
+    latency = list(monitor.alert_latency) if monitor else []
+    cycle_pct = percentiles(cycles)
+    return {
+        'settings': {k: v for k, v in vars(args).items() if k != 'json'},
+        'ingest': {
+            'signals': args.signals,
+            'trades': trades,
+            'codes': codes,
+            'ack_seconds': round(acked, 3),
+            'ingest_seconds': round(ingested, 3),
+            'signals_per_second': round(trades / ingested, 1) if ingested else None,
+        },
+        'cycle_ms': {k: round(v, 2) if isinstance(v, float) else v for k, v in cycle_pct.items()},
+        'cycles_within_interval': round(sum(c <= CHECK_INTERVAL * 1000 for c in cycles) / len(cycles) * 100, 1)
+        if cycles else None,
+        'alert_latency_s': {k: round(v, 3) if isinstance(v, float) else v for k, v in percentiles(latency).items()},
+        'telegram': {k: v for k, v in servers.stats.items() if k.startswith('telegram_')},
+        'memory': {
+            'mode': 'tracemalloc' if tracemalloc.is_tracing() else 'rss_peak',
+            'baseline_mb': round(baseline, 2),
+            'after_ingest_mb': round(after_ingest, 2),
+            'after_run_mb': round(after_run, 2),
+            'kb_per_trade': round((after_run - baseline) * 1024 / trades, 2) if trades else None,
+        },
+    }
+
+
+def format_report(report: dict) -> str:
+    ingest, memory = report['ingest'], report['memory']
+    cycle, latency = report['cycle_ms'], report['alert_latency_s']
+    interval = report['settings']['interval']
+    lines = [
+        f"📥 Ingest: {ingest['trades']}/{ingest['signals']} trades in {ingest['ingest_seconds']}s "
+        f"({ingest['signals_per_second']}/s), webhook acked in {ingest['ack_seconds']}s, codes {ingest['codes']}",
+        f"🔁 Cycles ({cycle.get('count', 0)}): p50 {cycle.get('p50')}ms, p90 {cycle.get('p90')}ms, "
+        f"p99 {cycle.get('p99')}ms, max {cycle.get('max')}ms "
+        f"| {report['cycles_within_interval']}% within {interval}s",
+        f"🔔 Alert latency ({latency.get('count', 0)}): p50 {latency.get('p50')}s, "
+        f"p90 {latency.get('p90')}s, p99 {latency.get('p99')}s",
+        f"📨 Telegram: {report['telegram']}",
+        f"🧠 Memory ({memory['mode']}): {memory['baseline_mb']} → {memory['after_run_mb']} MB, "
+        f"{memory['kb_per_trade']} KB/trade",
+    ]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic signal and price load for the webhook bot")
+    parser.add_argument('--signals', type=int, default=100, help="signals posted to the webhook")
+    parser.add_argument('--pairs', type=int, default=20, help="synthetic pairs")
+    parser.add_argument('--chats', type=int, default=0, help="distinct sender chats (default: one per signal)")
+    parser.add_argument('--operator-chat', type=int, default=1, help="CHAT_ID; follows every trade's alerts")
+    parser.add_argument('--duration', type=float, default=60, help="seconds to monitor after ingest")
+    parser.add_argument('--interval', type=int, default=10, help="CHECK_INTERVAL for the run")
+    parser.add_argument('--concurrency', type=int, default=50, help="parallel webhook requests")
+    parser.add_argument('--volatility', type=float, default=0.002, help="per-second price step")
+    parser.add_argument('--correlation', type=float, default=0.6, help="share of variance from the market factor")
+    parser.add_argument('--sl-pct', type=float, default=1.5, help="stop distance of generated signals (%%)")
+    parser.add_argument('--tp-pct', type=float, default=1.0, help="TP1 distance; TP2/TP3 at 2x/3x (%%)")
+    parser.add_argument('--latency', type=float, default=20, help="fake API latency (ms)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fake API 500 rate, Telegram included")
+    parser.add_argument('--telegram-rate', type=float, default=30, help="fake Telegram messages/s (Bot API: 30)")
+    parser.add_argument('--ingest-timeout', type=float, default=300, help="seconds to wait for all trades")
+    parser.add_argument('--port', type=int, default=8181, help="bot webhook port")
+    parser.add_argument('--fake-port', type=int, default=9000, help="fake servers port")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--no-tracemalloc', action='store_true', help="skip tracemalloc, which slows the bot several times; RSS peak only")
+    parser.add_argument('--verbose', action='store_true', help="show the bot's own output")
+    parser.add_argument('--json', help="write the report here")
+    args = parser.parse_args()
+
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+    os.chdir(tempfile.mkdtemp(prefix='loadgen-'))
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    # The monitor prints per trade per cycle; at load sizes that is the bottleneck
+    with redirect_stdout(sys.stdout if args.verbose else open(os.devnull, 'w')):
+        report = asyncio.run(run_load(args))
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
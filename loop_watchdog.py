@@ -0,0 +1,87 @@
+# loop_watchdog.py
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+from config import WATCHDOG
+from metrics import LOOP_LAG, LOOP_BLOCKED
+
+
+class LoopWatchdog:
+    """Measure event-loop lag and dump the stack of whatever blocks the loop
+
+    A coroutine wakes every `interval` seconds and records how late it
+    woke. A daemon thread watches that heartbeat; when the loop has not
+    come back for `block_threshold` seconds it prints the loop thread's
+    current stack, i.e. the synchronous call that is holding it.
+    """
+
+    def __init__(self, interval: float = WATCHDOG['INTERVAL'],
+                 block_threshold: float = WATCHDOG['BLOCK_THRESHOLD']):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.loop_thread: Optional[int] = None
+        self.heartbeat = time.monotonic()
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.blocked = 0
+        self.running = False
+        self._stopped = threading.Event()
+
+    async def run(self):
+        self.running = True
+        self.loop_thread = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        self._stopped.clear()
+        threading.Thread(target=self._watch, name='loop-watchdog', daemon=True).start()
+        try:
+            while self.running:
+                started = time.monotonic()
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                self.last_lag = max(0.0, now - started - self.interval)
+                self.max_lag = max(self.max_lag, self.last_lag)
+                self.heartbeat = now
+                LOOP_LAG.observe(self.last_lag)
+        finally:
+            self.running = False
+            self._stopped.set()
+
+    def stop(self):
+        self.running = False
+        self._stopped.set()
+
+    def _watch(self):
+        """Watcher thread: runs while the loop itself cannot"""
+        reported = None     # heartbeat of the stall already dumped
+        while not self._stopped.wait(self.interval / 2):
+            stalled = time.monotonic() - self.heartbeat - self.interval
+            if stalled < self.block_threshold:
+                if reported is not None:
+                    print(f"✅ Event loop recovered after {self.heartbeat - reported - self.interval:.1f}s")
+                    reported = None
+                continue
+            if reported == self.heartbeat:
+                continue
+            # Once per stall, while the blocking call is still on the stack
+            reported = self.heartbeat
+            self.blocked += 1
+            LOOP_BLOCKED.inc()
+            frame = sys._current_frames().get(self.loop_thread)
+            stack = ''.join(traceback.format_stack(frame)) if frame else '(no frame)\n'
+            print(f"⚠️ Event loop blocked for {stalled:.1f}s in:\n{stack}", end='')
+
+    def lag(self) -> float:
+        """Current lag: the last measured one, or how overdue the heartbeat is now"""
+        overdue = time.monotonic() - self.heartbeat - self.interval
+        return max(self.last_lag, overdue, 0.0)
+
+    def snapshot(self) -> dict:
+        return {
+            'running': self.running,
+            'lag_seconds': round(self.lag(), 4),
+            'max_lag_seconds': round(self.max_lag, 4),
+            'blocked': self.blocked,
+        }
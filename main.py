@@ -1,17 +1,21 @@
 # main.py
 import os
-import re
 import json
 import uuid
 import threading
 import time
+import queue
 import requests
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict
 
 from flask import Flask, request, jsonify
 
+from signal_parser import parse_fields, detect_format, SignalParseError
+from clock import real_clock
+
 # ========== CONFIG ==========
 BOT_TOKEN = os.getenv('BOT_TOKEN')
 CHAT_ID = os.getenv('CHAT_ID')
@@ -21,6 +25,37 @@ RAILWAY_URL = os.getenv('RAILWAY_PUBLIC_DOMAIN')
 if not BOT_TOKEN or not CHAT_ID:
     raise ValueError("BOT_TOKEN and CHAT_ID required!")
 
+# Overridable so the bot can run against fake_servers.py
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org').rstrip('/')
+COINGECKO_BASE_URL = os.getenv('COINGECKO_BASE_URL', 'https://api.coingecko.com/api/v3').rstrip('/')
+TELEGRAM_API = f"{TELEGRAM_API_URL}/bot{BOT_TOKEN}"
+SEND_QUEUE_SIZE = int(os.getenv('SEND_QUEUE_SIZE', '1000'))
+
+# Time source of the monitor thread; replays swap in a VirtualClock
+clock = real_clock
+
+# ========== HTTP SESSIONS ==========
+def make_session(retry: Retry, pool_size: int = 10) -> requests.Session:
+    """Session with a shared connection pool and retry policy"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+# Shared by the Flask threads, the monitor thread and the sender thread.
+# Telegram POSTs are only retried when the connection failed: after a
+# read error or a 5xx the message may already be delivered, and a retry
+# would send it twice. deliver_message handles 429 itself.
+telegram_http = make_session(Retry(
+    total=3, connect=3, read=0, status=0, other=0, backoff_factor=0.5,
+    allowed_methods=None,
+))
+price_http = make_session(Retry(
+    total=3, backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+))
+
 # ========== DATA MODEL ==========
 @dataclass
 class Trade:
@@ -91,6 +126,9 @@ class Database:
     def __init__(self, filename="trades.json"):
         self.filename = filename
         self.trades: List[Trade] = []
+        # Bumped whenever a trade is added or its /status row changes
+        self.version = 0
+        self.state_keys: Dict[str, tuple] = {}
         self.load()
     
     def load(self):
@@ -113,8 +151,15 @@ class Database:
     
     def add(self, trade: Trade):
         self.trades.append(trade)
+        self._touch(trade)
         self.save()
     
+    def _touch(self, trade: Trade):
+        key = (trade.status, trade.current_sl, trade.tp1_hit, trade.tp2_hit, trade.tp3_hit)
+        if self.state_keys.get(trade.id) != key:
+            self.state_keys[trade.id] = key
+            self.version += 1
+    
     def get_active(self) -> List[Trade]:
         return [t for t in self.trades if t.status not in ['CLOSED', 'EXPIRED']]
     
@@ -128,6 +173,7 @@ class Database:
         for i, t in enumerate(self.trades):
             if t.id == trade.id:
                 self.trades[i] = trade
+                self._touch(trade)
                 self.save()
                 return
 
@@ -135,72 +181,31 @@ db = Database()
 
 # ========== SIGNAL PARSER ==========
 def parse_signal(text: str) -> Optional[Trade]:
+    """Shared field parser; a malformed signal (no SL/TP, wrong side) is rejected"""
     try:
-        pair_match = re.search(r'🔴\s+(\w+)\s+\|\s+(LONG|SHORT)', text)
-        if not pair_match:
-            return None
-        
-        pair = pair_match.group(1)
-        direction = pair_match.group(2)
-        
-        strength_match = re.search(r'(\d+)/100', text)
-        strength = int(strength_match.group(1)) if strength_match else 50
-        
-        entry_match = re.search(r'\$(\d+\.\d+)\s*-\s*\$(\d+\.\d+)', text)
-        entry_min = float(entry_match.group(1)) if entry_match else 0.0
-        entry_max = float(entry_match.group(2)) if entry_match else 0.0
-        
-        prices = re.findall(r'\$(\d+\.\d+)', text)
-        
-        sl_price = 0.0
-        tp1 = tp2 = tp3 = 0.0
-        
-        if len(prices) >= 4:
-            sl_price = float(prices[2])
-            tp1 = float(prices[3])
-            tp2 = float(prices[4]) if len(prices) > 4 else 0.0
-            tp3 = float(prices[5]) if len(prices) > 5 else 0.0
-        
-        entry_avg = (entry_min + entry_max) / 2
-        
-        if tp2 == 0 and tp1 > 0:
-            if direction == "LONG":
-                tp2 = tp1 + (tp1 - entry_min) * 0.6
-                tp3 = tp2 + (tp1 - entry_min) * 0.6
-            else:
-                tp2 = tp1 - (entry_max - tp1) * 0.6
-                tp3 = tp2 - (entry_max - tp1) * 0.6
-        
-        risk_match = re.search(r'💵\s*Risk:\s*(\d+\.?\d*)%', text)
-        risk = float(risk_match.group(1)) if risk_match else 1.0
-        
-        lev_match = re.search(r'⚡\s*Leverage:\s*([\d\-]+)x', text)
-        leverage = lev_match.group(1) if lev_match else "1-2x"
-        
-        valid_match = re.search(r'⏳\s*Valid:\s*(\d+)h', text)
-        valid_hours = int(valid_match.group(1)) if valid_match else 4
-        
-        return Trade(
-            id=str(uuid.uuid4())[:8],
-            pair=pair,
-            direction=direction,
-            entry_min=entry_min,
-            entry_max=entry_max,
-            tp1=tp1,
-            tp2=tp2,
-            tp3=tp3,
-            stop_loss=sl_price,
-            risk_percent=risk,
-            leverage=leverage,
-            valid_hours=valid_hours,
-            strength=strength,
-            created_at=datetime.utcnow().isoformat(),
-            breakeven_price=entry_avg,
-            current_sl=sl_price,
-        )
-    except Exception as e:
+        fields = parse_fields(text)
+    except SignalParseError as e:
         print(f"Parse error: {e}")
         return None
+    
+    return Trade(
+        id=str(uuid.uuid4())[:8],
+        pair=fields.pair,
+        direction=fields.direction,
+        entry_min=fields.entry_min,
+        entry_max=fields.entry_max,
+        tp1=fields.tp1,
+        tp2=fields.tp2,
+        tp3=fields.tp3,
+        stop_loss=fields.stop_loss,
+        risk_percent=fields.risk,
+        leverage=fields.leverage,
+        valid_hours=fields.valid_hours,
+        strength=fields.strength,
+        created_at=clock.utcnow().isoformat(),
+        breakeven_price=fields.entry_avg,
+        current_sl=fields.stop_loss,
+    )
 
 # ========== PRICE FETCHER ==========
 def get_price(symbol: str) -> float:
@@ -214,8 +219,8 @@ def get_price(symbol: str) -> float:
         }
         coin_id = coin_map.get(coin, coin)
         
-        url = f"https://api.coingecko.com/api/v3/simple/price?ids={coin_id}&vs_currencies=usd"
-        response = requests.get(url, timeout=10)
+        url = f"{COINGECKO_BASE_URL}/simple/price?ids={coin_id}&vs_currencies=usd"
+        response = price_http.get(url, timeout=10)
         data = response.json()
         
         if coin_id in data:
@@ -280,7 +285,7 @@ def check_alerts(trade: Trade, price: float) -> List[str]:
         trade.status = 'CLOSED'
     
     # Update history
-    trade.price_history.append({'time': datetime.utcnow().isoformat(), 'price': price})
+    trade.price_history.append({'time': clock.utcnow().isoformat(), 'price': price})
     trade.price_history = trade.price_history[-50:]
     
     return alerts
@@ -302,26 +307,17 @@ def monitor_loop():
                 alerts = check_alerts(trade, price)
                 
                 for alert in alerts:
-                    try:
-                        url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-                        data = {
-                            'chat_id': CHAT_ID,
-                            'text': alert,
-                            'parse_mode': 'HTML'
-                        }
-                        requests.post(url, data=data, timeout=10)
-                        print(f"✅ Alert: {alert[:50]}")
-                    except Exception as e:
-                        print(f"❌ Send error: {e}")
+                    send_message(CHAT_ID, alert)
+                    print(f"✅ Alert: {alert[:50]}")
                 
                 db.update(trade)
                 print(f"📊 {trade.pair}: ${price:.6f} | {trade.status}")
             
-            time.sleep(10)
+            clock.sleep(10)
             
         except Exception as e:
             print(f"❌ Monitor error: {e}")
-            time.sleep(30)
+            clock.sleep(30)
 
 # ========== FLASK APP ==========
 app = Flask(__name__)
@@ -332,7 +328,7 @@ def health():
     return jsonify({
         'status': 'ok',
         'bot': 'running',
-        'time': datetime.utcnow().isoformat(),
+        'time': clock.utcnow().isoformat(),
         'active_trades': len(db.get_active())
     })
 
@@ -360,21 +356,10 @@ Send signal to start monitoring!"""
             
             # /status command
             elif text == '/status':
-                active = db.get_active()
-                if not active:
-                    send_message(chat_id, "⏳ No active trades")
-                else:
-                    reply = "📊 <b>Active Trades:</b>\n\n"
-                    for t in active:
-                        emoji = "🟢" if t.direction == "LONG" else "🔴"
-                        status = "🥉TP3" if t.tp3_hit else "🥈TP2" if t.tp2_hit else "🥇TP1" if t.tp1_hit else "⏳PENDING"
-                        reply += f"{emoji} <b>{t.pair}</b> | {status}\n"
-                        reply += f"   Entry: ${t.entry_avg:.4f}\n"
-                        reply += f"   SL: ${t.current_sl:.4f}\n\n"
-                    send_message(chat_id, reply)
+                send_message(chat_id, status_text())
             
             # Signal message
-            elif '🔴' in text:
+            elif detect_format(text):
                 trade = parse_signal(text)
                 if not trade:
                     send_message(chat_id, "❌ Failed to parse signal")
@@ -405,14 +390,76 @@ Send signal to start monitoring!"""
         print(f"Webhook error: {e}")
         return 'Error', 500
 
+# ========== TELEGRAM SENDER ==========
+send_queue: "queue.Queue" = queue.Queue(maxsize=SEND_QUEUE_SIZE)
+sender_lock = threading.Lock()
+sender_thread: Optional[threading.Thread] = None
+
+# ========== VIEWS ==========
+status_cache = {'version': None, 'text': None}
+
+def status_text() -> str:
+    """/status reply, rebuilt only after a trade's state changed"""
+    if status_cache['version'] == db.version:
+        return status_cache['text']
+    
+    active = db.get_active()
+    if not active:
+        reply = "⏳ No active trades"
+    else:
+        reply = "📊 <b>Active Trades:</b>\n\n"
+        for t in active:
+            emoji = "🟢" if t.direction == "LONG" else "🔴"
+            status = "🥉TP3" if t.tp3_hit else "🥈TP2" if t.tp2_hit else "🥇TP1" if t.tp1_hit else "⏳PENDING"
+            reply += f"{emoji} <b>{t.pair}</b> | {status}\n"
+            reply += f"   Entry: ${t.entry_avg:.4f}\n"
+            reply += f"   SL: ${t.current_sl:.4f}\n\n"
+    
+    status_cache['version'] = db.version
+    status_cache['text'] = reply
+    return reply
+
 def send_message(chat_id, text):
-    """Send Telegram message using HTTP API"""
+    """Queue a Telegram message; the sender thread delivers it"""
+    start_sender()
     try:
-        url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-        data = {'chat_id': chat_id, 'text': text, 'parse_mode': 'HTML'}
-        requests.post(url, data=data, timeout=10)
-    except Exception as e:
-        print(f"Send message error: {e}")
+        send_queue.put_nowait((chat_id, text))
+    except queue.Full:
+        print(f"❌ Send queue full, dropped: {text[:50]}")
+
+def start_sender():
+    """Start the sender thread once per process (gunicorn never runs __main__)"""
+    global sender_thread
+    with sender_lock:
+        if sender_thread is None or not sender_thread.is_alive():
+            sender_thread = threading.Thread(target=sender_loop, daemon=True)
+            sender_thread.start()
+
+def sender_loop():
+    """Background thread delivering queued messages in order"""
+    while True:
+        chat_id, text = send_queue.get()
+        try:
+            deliver_message(chat_id, text)
+        finally:
+            send_queue.task_done()
+
+def deliver_message(chat_id, text, attempts: int = 3) -> bool:
+    """Send Telegram message using HTTP API, waiting out 429s"""
+    data = {'chat_id': chat_id, 'text': text, 'parse_mode': 'HTML'}
+    for _ in range(attempts):
+        try:
+            response = telegram_http.post(f"{TELEGRAM_API}/sendMessage", data=data, timeout=10)
+            if response.status_code == 429:
+                retry_after = response.json().get('parameters', {}).get('retry_after', 1)
+                print(f"⏳ Telegram 429, retry in {retry_after}s")
+                time.sleep(retry_after)
+                continue
+            return response.ok
+        except Exception as e:
+            print(f"Send message error: {e}")
+            return False
+    return False
 
 # ========== MAIN ==========
 if __name__ == '__main__':
@@ -424,8 +471,7 @@ if __name__ == '__main__':
     if RAILWAY_URL:
         webhook_url = f"https://{RAILWAY_URL}/webhook"
         try:
-            url = f"https://api.telegram.org/bot{BOT_TOKEN}/setWebhook"
-            requests.post(url, data={'url': webhook_url}, timeout=10)
+            telegram_http.post(f"{TELEGRAM_API}/setWebhook", data={'url': webhook_url}, timeout=10)
             print(f"✅ Webhook: {webhook_url}")
         except Exception as e:
             print(f"⚠️ Webhook error: {e}")
@@ -0,0 +1,168 @@
+# metrics.py
+"""Process metrics in the Prometheus text format, served at /metrics
+
+Counters, gauges and histograms are plain dicts keyed by label values, so
+recording one costs a dict lookup and an add. A lock keeps increments from
+the price fetch threads exact; it is uncontended on the event loop.
+"""
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Seconds; fine at the low end for alert checks and sends, coarse for slow cycles
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+REGISTRY: List["Metric"] = []
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), register: bool = True):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+        if register:
+            REGISTRY.append(self)
+
+    def _label_text(self, values: tuple, extra: str = '') -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def samples(self) -> List[str]:
+        return []
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonic count; inc('label value', ..., amount=1)"""
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, *labels) -> float:
+        return self.values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{self._label_text(labels)} {_format_value(value)}"
+                for labels, value in list(self.values.items())]
+
+
+class Gauge(Metric):
+    """Current value, either set() or read from a function at scrape time"""
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[tuple, float] = {}
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, *labels):
+        self.values[labels] = value
+
+    def set_function(self, function: Optional[Callable[[], float]]):
+        """Computed on scrape (unlabelled gauges only), e.g. active trades"""
+        self.function = function
+
+    def get(self, *labels) -> float:
+        if self.function and not labels:
+            return self.function()
+        return self.values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        if self.function:
+            try:
+                return [f"{self.name} {_format_value(self.function())}"]
+            except Exception as e:
+                print(f"⚠️ Gauge {self.name} failed: {e}")
+                return []
+        return [f"{self.name}{self._label_text(labels)} {_format_value(value)}"
+                for labels, value in list(self.values.items())]
+
+
+class Histogram(Metric):
+    """Bucketed observations with sum and count; observe(value, 'label value', ...)"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS, register: bool = True):
+        super().__init__(name, help, labels, register)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self.values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels) -> int:
+        series = self.values.get(labels)
+        return series[2] if series else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in list(self.values.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{self._label_text(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._label_text(labels)} {count}")
+        return lines
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# ========== BOT METRICS ==========
+
+MONITOR_CYCLE = Histogram('smarttrade_monitor_cycle_seconds', "Duration of one monitor cycle over all active trades")
+ACTIVE_TRADES = Gauge('smarttrade_active_trades', "Trades not closed or expired")
+PRICE_FETCH = Histogram('smarttrade_price_fetch_seconds', "Price API request latency",
+                        ('source', 'endpoint'))
+PRICE_ERRORS = Counter('smarttrade_price_fetch_errors_total', "Failed price API requests",
+                       ('source', 'endpoint'))
+ALERTS = Counter('smarttrade_alerts_total', "Alert events fired, per alert type", ('type',))
+ALERT_LATENCY = Histogram('smarttrade_alert_latency_seconds', "Time from price check to delivered alert")
+TELEGRAM_SEND = Histogram('smarttrade_telegram_send_seconds', "Telegram sendMessage latency", ('result',))
+TELEGRAM_429 = Counter('smarttrade_telegram_rate_limited_total', "Telegram 429 (retry_after) answers")
+DB_SAVE = Histogram('smarttrade_db_save_seconds', "trades.json write duration")
+LOOP_LAG = Histogram('smarttrade_event_loop_lag_seconds', "How late the watchdog heartbeat woke up")
+LOOP_BLOCKED = Counter('smarttrade_event_loop_blocked_total', "Stalls longer than the watchdog threshold")
+MONITOR_CYCLE_AGE = Gauge('smarttrade_monitor_last_cycle_age_seconds', "Seconds since the last completed monitor cycle")
+WEBHOOK_QUEUE = Gauge('smarttrade_webhook_queue_depth', "Telegram updates waiting for a worker")
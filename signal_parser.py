@@ -1,93 +1,510 @@
 # signal_parser.py
 import re
-from datetime import datetime
+import csv
+import io
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 from database import Trade
-import uuid
+from config import SIGNAL_CACHE_SIZE
+from clock import Clock, real_clock
 
-class SignalParser:
-    def parse(self, text: str) -> Trade:
-        """Parse signal from your bot format"""
-        
-        # Extract pair and direction
-        pair_match = re.search(r'🔴\s+(\w+)\s+\|\s+(LONG|SHORT)', text)
-        pair = pair_match.group(1) if pair_match else "UNKNOWN"
-        direction = pair_match.group(2) if pair_match else "LONG"
-        
-        # Extract strength
-        strength_match = re.search(r'(\d+)/100', text)
-        strength = int(strength_match.group(1)) if strength_match else 50
-        
-        # Extract entry
-        entry_match = re.search(r'\$(\d+\.\d+)\s*-\s*\$(\d+\.\d+)', text)
-        entry_min = float(entry_match.group(1)) if entry_match else 0.0
-        entry_max = float(entry_match.group(2)) if entry_match else 0.0
-        
-        # Extract prices
-        prices = re.findall(r'\$(\d+\.\d+)', text)
-        
-        sl_price = 0.0
-        tp1 = tp2 = tp3 = 0.0
-        
-        if len(prices) >= 4:
-            sl_price = float(prices[2])
-            tp1 = float(prices[3])
-            tp2 = float(prices[4]) if len(prices) > 4 else 0.0
-            tp3 = float(prices[5]) if len(prices) > 5 else 0.0
-        
-        # Calculate missing TPs
-        entry_avg = (entry_min + entry_max) / 2
-        if tp2 == 0 and tp1 > 0:
-            if direction == "LONG":
-                tp2 = tp1 + (tp1 - entry_min) * 0.6
-                tp3 = tp2 + (tp1 - entry_min) * 0.6
+# ========== FIELD PATTERNS ==========
+# Each field has its own small precompiled pattern that begins with a
+# literal or a character class, so re jumps to candidate positions in C
+# instead of trying every position of the message. Labelled prices
+# (SL / TP1..3) win; unlabelled "$" prices after the entry range are only
+# used positionally (SL, TP1, TP2, TP3) when a label is missing. All
+# formats use the same groups, so scan_fields() serves every one.
+
+NUMBER = r'\d+(?:\.\d+)?'
+
+
+def label_pattern(gap: str) -> re.Pattern:
+    """SL / Stop Loss / TP1-3 / Target 1-3 (any case), `gap`, then the price
+    
+    Groups: tp number, target number, price. The leading character class
+    keeps the fast scan; the lookbehinds give the word boundary and pick
+    the label family from that first character.
+    """
+    return re.compile(
+        r'[SsTt](?<!\w[SsTt])'
+        r'(?i:(?<=s)(?:l|top\s*loss)|(?<=t)(?:p\s*([123])|arget\s*([123])))\b'
+        + gap + f'({NUMBER})')
+
+
+@dataclass(frozen=True)
+class FieldPatterns:
+    header: re.Pattern      # groups: pair, direction
+    entry: re.Pattern       # groups: entry min, entry max
+    label: re.Pattern       # see label_pattern()
+    strength: re.Pattern
+    risk: re.Pattern
+    leverage: re.Pattern
+    valid: re.Pattern
+    price: Optional[re.Pattern] = None     # unlabelled price; None when labels are required
+
+
+# 🔴 SEIUSDT | LONG ... $0.4100 - $0.4200 ... SL: $0.3900 ...
+CLASSIC_FIELDS = FieldPatterns(
+    header=re.compile(r'🔴\s+(\w+)\s+\|\s+(LONG|SHORT)'),
+    entry=re.compile(rf'\$({NUMBER})\s*-\s*\$({NUMBER})'),
+    label=label_pattern(r'[^$\n]*\$'),
+    strength=re.compile(r'(\d+)/100'),
+    risk=re.compile(rf'💵\s*Risk:\s*({NUMBER})%'),
+    leverage=re.compile(r'⚡\s*Leverage:\s*([\d\-]+)x'),
+    valid=re.compile(r'⏳\s*Valid:\s*(\d+)h'),
+    price=re.compile(rf'\$({NUMBER})'),
+)
+
+# #SEIUSDT LONG / Entry: 0.41 - 0.42 / SL: 0.39 / TP1: 0.44 ... (labels required)
+HASHTAG_FIELDS = FieldPatterns(
+    header=re.compile(r'\#(\w+)\s+(LONG|SHORT|BUY|SELL)\b', re.IGNORECASE),
+    entry=re.compile(rf'\bEntry[^\d\n]*({NUMBER})\s*[-–]\s*\$?({NUMBER})', re.IGNORECASE),
+    label=label_pattern(r'[^\d\n]*'),
+    strength=re.compile(r'(\d+)/100'),
+    risk=re.compile(rf'\bRisk[^\d\n]*({NUMBER})%', re.IGNORECASE),
+    leverage=re.compile(r'\bLeverage[^\d\n]*([\d\-]+)x?', re.IGNORECASE),
+    valid=re.compile(r'\bValid[^\d\n]*(\d+)\s*h', re.IGNORECASE),
+)
+
+# Start patterns set their own case rules: the classic header is case-sensitive
+_START_FLAGS = re.MULTILINE
+
+# Label number (empty for SL) -> level name
+LEVEL_NAMES = {'': 'sl', '1': 'tp1', '2': 'tp2', '3': 'tp3'}
+
+DIRECTIONS = {'LONG': 'LONG', 'BUY': 'LONG', 'SHORT': 'SHORT', 'SELL': 'SHORT'}
+
+
+@dataclass(frozen=True)
+class SignalFormat:
+    name: str
+    marker: str             # first character of its start pattern
+    start: str              # regex matching the start of one signal
+    fields: FieldPatterns
+    hint: str               # shown when the header is missing
+    # Plain words that also mark a message as this format, so it gets a parse error
+    aliases: Tuple[str, ...] = ()
+    start_re: re.Pattern = field(init=False, repr=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'start_re', re.compile(self.start, _START_FLAGS))
+
+
+# ========== FORMAT REGISTRY ==========
+# A signal may start anywhere in a message (forwarded headers, a line of
+# commentary first). One search for the start of any format finds it; the
+# marker character there picks the format from _BY_MARKER, so only the
+# formats sharing that marker are tried.
+
+FORMATS: List[SignalFormat] = []
+_BY_MARKER: Dict[str, List[SignalFormat]] = {}
+_BY_ALIAS: Dict[str, SignalFormat] = {}
+_SIGNAL_START = re.compile(r'(?!)')
+# The same starts without lookaheads: each begins with its marker, so a
+# search skips to marker characters
+_START_ANY = re.compile(r'(?!)')
+
+
+def register_format(fmt: SignalFormat):
+    global _SIGNAL_START, _START_ANY
+    FORMATS.append(fmt)
+    _BY_MARKER.setdefault(fmt.marker, []).append(fmt)
+    for alias in fmt.aliases:
+        _BY_ALIAS.setdefault(alias, fmt)
+    # Start of each signal in a message holding several, in any format
+    _SIGNAL_START = re.compile('|'.join(f'(?={f.start})' for f in FORMATS), _START_FLAGS)
+    _START_ANY = re.compile('|'.join(f.start for f in FORMATS), _START_FLAGS)
+
+
+def detect_format(text: str) -> Optional[SignalFormat]:
+    """Registered format of a message, or None when it is not a signal"""
+    start = _START_ANY.search(text)
+    if start is not None:
+        position = start.start()
+        candidates = _BY_MARKER[text[position]]
+        if len(candidates) == 1:
+            # The combined search already matched this format's start here
+            return candidates[0]
+        for fmt in candidates:
+            if fmt.start_re.match(text, position):
+                return fmt
+    for alias, fmt in _BY_ALIAS.items():
+        if alias in text:
+            return fmt
+    return None
+
+
+register_format(SignalFormat(
+    name='classic',
+    marker='🔴',
+    start=r'🔴\s+\w+\s+\|\s+(?:LONG|SHORT)',
+    fields=CLASSIC_FIELDS,
+    hint="🔴 PAIR | LONG/SHORT",
+    aliases=('SETP',),
+))
+register_format(SignalFormat(
+    name='hashtag',
+    marker='#',
+    # '#' first (at a line start) so the start search can skip to it
+    start=r'\#(?<![^\n]\#)(?i:\w+\s+(?:LONG|SHORT|BUY|SELL)\b)',
+    fields=HASHTAG_FIELDS,
+    hint="#PAIR LONG/SHORT",
+))
+
+# Columns of a CSV import; tp2/tp3, risk, leverage, valid_hours, strength and
+# created_at (ISO time the signal was given, e.g. for backtests) are optional
+CSV_COLUMNS = ['pair', 'direction', 'entry_min', 'entry_max', 'stop_loss', 'tp1', 'tp2', 'tp3',
+               'risk', 'leverage', 'valid_hours', 'strength', 'created_at']
+
+
+class SignalParseError(ValueError):
+    """A signal that must not become a trade; `errors` lists every problem"""
+
+    def __init__(self, errors: List[str], warnings: Optional[List[str]] = None):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+        self.warnings = warnings or []
+
+
+@dataclass
+class SignalFields:
+    pair: str
+    direction: str
+    entry_min: float
+    entry_max: float
+    stop_loss: float
+    tp1: float
+    tp2: float = 0.0
+    tp3: float = 0.0
+    risk: float = 1.0
+    leverage: str = "1-2x"
+    valid_hours: int = 4
+    strength: int = 50
+    # Defaults and fallbacks used while parsing
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def entry_avg(self) -> float:
+        return (self.entry_min + self.entry_max) / 2
+
+    def complete(self) -> 'SignalFields':
+        """Derive missing TP2/TP3 and reject inconsistent levels"""
+        if self.tp1 > 0:
+            # Each missing target sits 60% of the entry -> TP1 distance further out
+            if self.direction == "LONG":
+                step = (self.tp1 - self.entry_min) * 0.6
             else:
-                tp2 = tp1 - (entry_max - tp1) * 0.6
-                tp3 = tp2 - (entry_max - tp1) * 0.6
+                step = (self.tp1 - self.entry_max) * 0.6
+            if self.tp2 == 0:
+                self.tp2 = self.tp1 + step
+                self.warnings.append("TP2 derived from TP1")
+            if self.tp3 == 0:
+                self.tp3 = self.tp2 + step
+                self.warnings.append("TP3 derived from TP2")
         
-        # Extract risk
-        risk_match = re.search(r'💵\s*Risk:\s*(\d+\.?\d*)%', text)
-        risk = float(risk_match.group(1)) if risk_match else 1.0
-        
-        # Extract leverage
-        lev_match = re.search(r'⚡\s*Leverage:\s*([\d\-]+)x', text)
-        leverage = lev_match.group(1) if lev_match else "1-2x"
+        errors = check_levels(self.direction, self.entry_min, self.entry_max, self.stop_loss,
+                              self.tp1, self.tp2, self.tp3)
+        if errors:
+            raise SignalParseError(errors, self.warnings)
+        return self
+
+
+def check_levels(direction: str, entry_min: float, entry_max: float, stop_loss: float,
+                 tp1: float, tp2: float, tp3: float) -> List[str]:
+    """Problems that make SL/TP monitoring meaningless"""
+    errors = []
+    if direction not in ("LONG", "SHORT"):
+        errors.append(f"bad direction {direction}")
+    if entry_min <= 0 or entry_max <= 0 or entry_min > entry_max:
+        errors.append("bad entry range")
+    if stop_loss <= 0:
+        errors.append("SL missing")
+    if tp1 <= 0:
+        errors.append("TP1 missing")
+    if errors:
+        return errors
+
+    entry = (entry_min + entry_max) / 2
+    if direction == "LONG":
+        if not stop_loss < entry < tp1:
+            errors.append("LONG needs SL < entry < TP1")
+        elif not tp1 < tp2 < tp3:
+            errors.append("LONG needs TP1 < TP2 < TP3")
+    else:
+        if not tp1 < entry < stop_loss:
+            errors.append("SHORT needs TP1 < entry < SL")
+        elif not tp1 > tp2 > tp3 > 0:
+            errors.append("SHORT needs TP1 > TP2 > TP3 > 0")
+    return errors
+
+
+def parse_fields(text: str) -> SignalFields:
+    """Detect the format of a signal and extract its fields
+
+    Raises SignalParseError instead of defaulting a missing SL/TP to 0.
+    """
+    fmt = detect_format(text)
+    if fmt is None:
+        raise SignalParseError(["unknown signal format"])
+    return scan_fields(fmt, text)
+
+
+def scan_fields(fmt: SignalFormat, text: str) -> SignalFields:
+    """Extract every field of one signal with the format's field patterns"""
+    p = fmt.fields
+    errors, warnings = [], []
+    header = p.header.search(text)
+    if header is None:
+        errors.append(f"header '{fmt.hint}' not found")
+    entry = p.entry.search(text)
+    if entry is None:
+        errors.append("entry range 'min - max' not found")
+    
+    # Reversed so the first label of each level wins
+    labelled = {LEVEL_NAMES[tp_n or target_n]: float(price)
+                for tp_n, target_n, price in reversed(p.label.findall(text))}
+    
+    # Positional fallback for unlabelled levels, in the order SL, TP1, TP2, TP3
+    levels = labelled
+    if len(labelled) < 4 and entry is not None and p.price is not None:
+        taken = {m.start(3) for m in p.label.finditer(text)}
+        loose = [float(m[1]) for m in p.price.finditer(text, entry.end()) if m.start(1) not in taken]
+        if loose:
+            levels = {}
+            for name in ('sl', 'tp1', 'tp2', 'tp3'):
+                if name in labelled:
+                    levels[name] = labelled[name]
+                elif loose:
+                    levels[name] = loose.pop(0)
+                    warnings.append(f"{name.upper()} taken by position")
+    for name in ('sl', 'tp1'):
+        if name not in levels:
+            errors.append(f"{name.upper()} not found")
+    
+    if errors:
+        raise SignalParseError(errors, warnings)
+    
+    strength = p.strength.search(text)
+    if strength is None:
+        warnings.append("strength defaulted to 50")
+    risk = p.risk.search(text)
+    if risk is None:
+        warnings.append("risk defaulted to 1.0")
+    leverage = p.leverage.search(text)
+    if leverage is None:
+        warnings.append("leverage defaulted to 1-2x")
+    valid = p.valid.search(text)
+    if valid is None:
+        warnings.append("valid defaulted to 4")
+    
+    return SignalFields(
+        pair=header[1].upper(),
+        direction=DIRECTIONS[header[2].upper()],
+        entry_min=float(entry[1]),
+        entry_max=float(entry[2]),
+        stop_loss=levels['sl'],
+        tp1=levels['tp1'],
+        tp2=levels.get('tp2', 0.0),
+        tp3=levels.get('tp3', 0.0),
+        risk=float(risk[1]) if risk else 1.0,
+        leverage=leverage[1] if leverage else "1-2x",
+        valid_hours=int(valid[1]) if valid else 4,
+        strength=int(strength[1]) if strength else 50,
+        warnings=warnings,
+    ).complete()
+
+
+# ========== DEDUP CACHE ==========
+
+@dataclass
+class CachedSignal:
+    fields: Optional[SignalFields] = None
+    error: Optional[SignalParseError] = None
+    # owner chat -> id of the trade created from this signal
+    trades: Dict[str, str] = field(default_factory=dict)
+
+
+class SignalCache:
+    """Bounded LRU of normalized-message hashes -> parse result
+
+    Forwarded copies of a signal hit the cache instead of the field patterns,
+    and tenants sending the same signal share one parse. Bulk imports
+    parse in worker threads, so the LRU is only touched under a lock.
+    """
+
+    def __init__(self, size: int = SIGNAL_CACHE_SIZE):
+        self.size = size
+        self.entries: "OrderedDict[bytes, CachedSignal]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        # Forwarding and copy/paste only change whitespace
+        normalized = ' '.join(text.split())
+        return hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+
+    @staticmethod
+    def parse(text: str) -> CachedSignal:
+        try:
+            return CachedSignal(fields=parse_fields(text))
+        except SignalParseError as e:
+            return CachedSignal(error=e)
+
+    def get(self, text: str) -> Optional[CachedSignal]:
+        """Cached parse of this text, or None without parsing it"""
+        if self.size <= 0:
+            return None
+        key = self.key(text)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            return entry
+
+    def lookup(self, text: str) -> CachedSignal:
+        """Cached parse of this text, parsing it on a miss"""
+        if self.size <= 0:
+            # Disabled: nothing can hit, so skip the hash
+            self.misses += 1
+            return self.parse(text)
         
-        # Extract validity
-        valid_match = re.search(r'⏳\s*Valid:\s*(\d+)h', text)
-        valid_hours = int(valid_match.group(1)) if valid_match else 4
+        key = self.key(text)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
         
+        # Parsed outside the lock; if another thread stored the same text
+        # meanwhile, its entry wins so both share one trades map
+        entry = self.parse(text)
+        with self.lock:
+            entry = self.entries.setdefault(key, entry)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return entry
+
+
+class SignalParser:
+    def __init__(self, cache_size: int = SIGNAL_CACHE_SIZE, clock: Optional[Clock] = None):
+        self.cache = SignalCache(cache_size)
+        self.clock = clock or real_clock
+    
+    def cached(self, text: str) -> Optional[CachedSignal]:
+        """Parse result of a message seen before, without parsing it"""
+        return self.cache.get(text)
+    
+    def lookup(self, text: str) -> CachedSignal:
+        """Parse result of a message, from the dedup cache when seen before"""
+        return self.cache.lookup(text)
+    
+    def parse(self, text: str) -> Trade:
+        """Parse signal from your bot format; raises SignalParseError"""
+        if self.cache.size <= 0:
+            return self._make_trade(parse_fields(text))
+        return self.build(self.lookup(text))
+    
+    def build(self, entry: CachedSignal) -> Trade:
+        """New trade from a cached parse"""
+        if entry.error:
+            raise entry.error
+        return self._make_trade(entry.fields)
+    
+    def _make_trade(self, fields: SignalFields) -> Trade:
         # Create trade with CORRECT field order
         return Trade(
             # Required fields first
-            id=str(uuid.uuid4())[:8],
-            pair=pair,
-            direction=direction,
-            entry_min=entry_min,
-            entry_max=entry_max,
-            tp1=tp1,
-            tp2=tp2,
-            tp3=tp3,
-            stop_loss=sl_price,
-            risk_percent=risk,
-            leverage=leverage,
-            valid_hours=valid_hours,
-            strength=strength,
-            created_at=datetime.utcnow(),
+            # Same 8 hex digits as str(uuid4())[:8], without building a UUID
+            id=os.urandom(4).hex(),
+            pair=fields.pair,
+            direction=fields.direction,
+            entry_min=fields.entry_min,
+            entry_max=fields.entry_max,
+            tp1=fields.tp1,
+            tp2=fields.tp2,
+            tp3=fields.tp3,
+            stop_loss=fields.stop_loss,
+            risk_percent=fields.risk,
+            leverage=fields.leverage,
+            valid_hours=fields.valid_hours,
+            strength=fields.strength,
+            created_at=self.clock.utcnow(),
             # Optional fields after
-            breakeven_price=entry_avg,
-            current_sl=sl_price,
-            tp1_hit=False,
-            tp2_hit=False,
-            tp3_hit=False,
-            tp1_closed_percent=0,
-            tp2_closed_percent=0,
-            tp3_closed_percent=0,
-            status='PENDING',
-            entry_price=None,
-            alerts_sent=[],
-            price_history=[]
+            breakeven_price=fields.entry_avg,
+            current_sl=fields.stop_loss,
+            # Hit flags, closed percents, status, entry price and the lists
+            # keep their Trade defaults (passing them costs a quarter of the call)
         )
     
+    # ============ BULK IMPORT ============
+    
+    def split(self, text: str) -> List[str]:
+        """Cut a message into one chunk per signal"""
+        return [chunk for chunk in _SIGNAL_START.split(text) if _SIGNAL_START.match(chunk)]
+    
+    def parse_many(self, text: str) -> Tuple[List[Trade], List[str]]:
+        """Parse every signal of a message or a CSV/text import
+        
+        Returns the valid trades and one error line per rejected signal.
+        """
+        first_line = text.lstrip().split('\n', 1)[0].lower()
+        if first_line.startswith('pair,'):
+            return self.parse_csv(text)
+        
+        trades, errors = [], []
+        for number, chunk in enumerate(self.split(text), 1):
+            try:
+                trades.append(self.parse(chunk))
+            except SignalParseError as e:
+                errors.append(f"#{number}: {e}")
+        return trades, errors
+    
+    def parse_csv(self, text: str) -> Tuple[List[Trade], List[str]]:
+        """One signal per row, columns as in CSV_COLUMNS"""
+        trades, errors = [], []
+        reader = csv.DictReader(io.StringIO(text.strip()))
+        # Row 1 is the header
+        for number, row in enumerate(reader, 2):
+            row = {k.strip().lower(): (v or '').strip() for k, v in row.items() if k}
+            try:
+                fields = SignalFields(
+                    pair=row['pair'].upper(),
+                    direction=row['direction'].upper(),
+                    entry_min=float(row['entry_min']),
+                    entry_max=float(row['entry_max']),
+                    stop_loss=float(row['stop_loss']),
+                    tp1=float(row['tp1']),
+                    tp2=float(row.get('tp2') or 0),
+                    tp3=float(row.get('tp3') or 0),
+                    risk=float(row.get('risk') or 1.0),
+                    leverage=row.get('leverage') or "1-2x",
+                    valid_hours=int(row.get('valid_hours') or 4),
+                    strength=int(row.get('strength') or 50),
+                )
+                trade = self._make_trade(fields.complete())
+                if row.get('created_at'):
+                    created = datetime.fromisoformat(row['created_at'])
+                    if created.tzinfo:
+                        # Trades keep naive UTC times
+                        created = created.astimezone(timezone.utc).replace(tzinfo=None)
+                    trade.created_at = created
+                trades.append(trade)
+            except (KeyError, ValueError) as e:
+                # SignalParseError is a ValueError
+                errors.append(f"row {number}: {e}")
+        return trades, errors
+    
     def format_summary(self, trade: Trade) -> str:
         """Format trade summary"""
         emoji = "🟢" if trade.direction == "LONG" else "🔴"
@@ -0,0 +1,142 @@
+# subscribers.py
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Set
+import json
+import os
+from config import (CHAT_ID, ALERT_LOCALE, ALERT_SEVERITY, ALERT_SEVERITY_LEVELS,
+                    DANGER_ALERTS, SUBSCRIBERS_FILE)
+
+_DANGER = set(DANGER_ALERTS)
+_RANK = {level: rank for rank, level in enumerate(ALERT_SEVERITY_LEVELS)}
+
+
+def severity_rank(alert_type: str) -> int:
+    return _RANK[ALERT_SEVERITY.get(alert_type, 'CRITICAL')]
+
+
+@dataclass
+class Subscriber:
+    chat_id: str
+    pairs: List[str] = field(default_factory=list)     # empty = every pair
+    min_severity: str = 'INFO'
+    mute_danger: bool = False
+    locale: str = ALERT_LOCALE
+    # Also receive alerts of trades owned by other chats (the operator chat, /subscribe all)
+    follow_all: bool = False
+    # Kept after /unsubscribe so the chat's own trades stay silent too
+    unsubscribed: bool = False
+
+    def wants(self, alert_type: str) -> bool:
+        if self.mute_danger and alert_type in _DANGER:
+            return False
+        return severity_rank(alert_type) >= _RANK.get(self.min_severity, 0)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class SubscriberRegistry:
+    """Chats receiving alerts, indexed by pair for the monitor's fan-out"""
+
+    def __init__(self, filename: str = SUBSCRIBERS_FILE):
+        self.filename = filename
+        self.subscribers: Dict[str, Subscriber] = {}
+        self.all_pairs: Set[str] = set()            # chat ids without a pair filter
+        self.by_pair: Dict[str, Set[str]] = {}      # pair -> chat ids
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.filename):
+            try:
+                with open(self.filename, 'r') as f:
+                    for data in json.load(f):
+                        # Files from before tenants: the operator followed everything
+                        data.setdefault('follow_all', data['chat_id'] == str(CHAT_ID))
+                        sub = Subscriber.from_dict(data)
+                        self.subscribers[sub.chat_id] = sub
+            except Exception as e:
+                print(f"Error loading subscribers: {e}")
+        else:
+            # Single-chat setups keep working unchanged
+            self.subscribers[str(CHAT_ID)] = Subscriber(chat_id=str(CHAT_ID), follow_all=True)
+        self._reindex()
+
+    def save(self):
+        try:
+            with open(self.filename, 'w') as f:
+                json.dump([asdict(s) for s in self.subscribers.values()], f, indent=2)
+        except Exception as e:
+            print(f"Error saving subscribers: {e}")
+
+    def _reindex(self):
+        self.all_pairs = set()
+        self.by_pair = {}
+        for sub in self.subscribers.values():
+            if sub.unsubscribed:
+                continue
+            if not sub.pairs:
+                self.all_pairs.add(sub.chat_id)
+            for pair in sub.pairs:
+                self.by_pair.setdefault(pair, set()).add(sub.chat_id)
+
+    # ============ MANAGEMENT ============
+
+    def get(self, chat_id) -> Optional[Subscriber]:
+        sub = self.subscribers.get(str(chat_id))
+        return None if sub is None or sub.unsubscribed else sub
+
+    def subscribe(self, chat_id, pairs: Optional[List[str]] = None,
+                  follow_all: Optional[bool] = None) -> Subscriber:
+        """Subscribe (again); follow_all also delivers other chats' trades on the pairs"""
+        sub = self.subscribers.get(str(chat_id)) or Subscriber(chat_id=str(chat_id))
+        sub.unsubscribed = False
+        if pairs is not None:
+            sub.pairs = sorted({p.upper() for p in pairs})
+        if follow_all is not None:
+            sub.follow_all = follow_all
+        self.subscribers[sub.chat_id] = sub
+        self._reindex()
+        self.save()
+        return sub
+
+    def unsubscribe(self, chat_id) -> bool:
+        sub = self.get(chat_id)
+        if sub is None:
+            return False
+        sub.unsubscribed = True
+        self._reindex()
+        self.save()
+        return True
+
+    def update(self, chat_id, **settings) -> Optional[Subscriber]:
+        sub = self.get(chat_id)
+        if sub is None:
+            return None
+        for key, value in settings.items():
+            setattr(sub, key, value)
+        self._reindex()
+        self.save()
+        return sub
+
+    # ============ FAN-OUT ============
+
+    def for_pair(self, pair: str) -> List[Subscriber]:
+        """Subscribers following this pair (explicitly or through no filter)"""
+        chat_ids = self.all_pairs | self.by_pair.get(pair, set())
+        return [self.subscribers[c] for c in chat_ids]
+
+    def for_trade(self, owner: str, pair: str) -> List[Subscriber]:
+        """The owner chat plus follow_all subscribers, each if following the pair
+
+        An owner that never subscribed still gets alerts with default settings;
+        one that unsubscribed gets none.
+        """
+        owner = str(owner)
+        subs = [s for s in self.for_pair(pair) if s.follow_all or s.chat_id == owner]
+        if owner not in self.subscribers:
+            subs.append(Subscriber(chat_id=owner))
+        return subs
+
+    def recipients(self, owner: str, pair: str, alert_type: str) -> List[Subscriber]:
+        return [s for s in self.for_trade(owner, pair) if s.wants(alert_type)]
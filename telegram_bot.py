@@ -1,23 +1,46 @@
 # telegram_bot.py
 from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, ContextTypes, filters
+from telegram.ext import Application, CallbackQueryHandler, CommandHandler, MessageHandler, ContextTypes, filters
 from aiohttp import web
 import asyncio
-from signal_parser import SignalParser
+import html
+from collections import OrderedDict
+from signal_parser import SignalParser, detect_format
 from database import TradeDatabase
 from trade_monitor import TradeMonitor
-from config import BOT_TOKEN, CHAT_ID, PORT, WEBHOOK_URL
+from dashboard import Dashboard
+from trade_views import TradeViews
+from subscribers import SubscriberRegistry
+from telegram_outbox import RateLimiter
+from loop_watchdog import LoopWatchdog
+import metrics
+from config import (BOT_TOKEN, CHAT_ID, PORT, WEBHOOK_URL, WEBHOOK, WEBHOOK_SECRET, ALERT_SEVERITY_LEVELS,
+                    BULK_IMPORT, TELEGRAM_BOT_URL, TELEGRAM_FILE_URL, WATCHDOG)
 
 class TelegramBot:
     def __init__(self):
         self.parser = SignalParser()
         self.db = TradeDatabase()
+        self.views = TradeViews(self.db)
+        self.subscribers = SubscriberRegistry()
         self.monitor = None
+        self.monitor_task = None
+        self.watchdog = LoopWatchdog()
+        # One Telegram send budget for replies, alerts and dashboard edits
+        self.limiter = RateLimiter()
+        self.dashboard = None
         self.application = None
         self.webhook_path = f"/webhook/{BOT_TOKEN}"
+        self.updates: asyncio.Queue = asyncio.Queue(maxsize=WEBHOOK['QUEUE_SIZE'])
+        self.seen_updates: OrderedDict = OrderedDict()
+        self.monitor_lock = asyncio.Lock()
+    
+    async def _reply(self, update: Update, text: str, **kwargs):
+        """reply_text within the shared rate limits"""
+        return await self.limiter.call(update.effective_chat.id, update.message.reply_text, text, **kwargs)
     
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        await update.message.reply_text(f"""
+        await self._reply(update, f"""
 🤖 <b>Smart Multi-TP Trade Bot</b> (CoinDCX Edition)
 
 <b>✅ Connected to CoinDCX</b>
@@ -35,101 +58,227 @@ class TelegramBot:
 /status - সব ট্রেড
 /history - ক্লোজড ট্রেড
 /close SYMBOL - বন্ধ করুন
+/dashboard - লাইভ ড্যাশবোর্ড (/dashboard off)
+/subscribe [all] [PAIR ...] - এই চ্যাটে অ্যালার্ট (all = সবার ট্রেড)
+/unsubscribe - অ্যালার্ট বন্ধ
+/alerts - অ্যালার্ট ফিল্টার
 /stop - মনিটরিং বন্ধ
 
 <b>ব্যবহার:</b>
 সিগন্যাল কপি করে পেস্ট করুন!
+একসাথে অনেক সিগন্যাল বা .txt/.csv ফাইলও পাঠাতে পারেন।
 """, parse_mode='HTML')
     
     async def handle_signal(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         text = update.message.text
         
-        if '🔴' not in text and 'SETP' not in text:
-            await update.message.reply_text("❌ এটা সিগন্যাল নয়!")
+        if detect_format(text) is None:
+            await self._reply(update, "❌ এটা সিগন্যাল নয়!")
             return
         
-        try:
-            trade = self.parser.parse(text)
-        except Exception as e:
-            await update.message.reply_text(f"❌ পার্স এরর: {e}")
+        # Forwarded copies are answered from the dedup cache without parsing
+        entry = self.parser.cached(text)
+        if entry is None:
+            if len(self.parser.split(text)) > 1:
+                await self._import(update, text)
+                return
+            entry = self.parser.lookup(text)
+        if entry.error:
+            await self._reply(update, f"❌ পার্স এরর: {entry.error}")
             return
         
-        existing = self.db.get_by_pair(trade.pair)
+        # Trade books are per chat: the same pair may run for several tenants
+        owner = str(update.effective_chat.id)
+        pair = entry.fields.pair
+        existing = self.db.get_by_pair(pair, owner)
         if existing:
-            await update.message.reply_text(
-                f"⚠️ {trade.pair} ইতিমধ্যে আছে!\n"
-                f"/close {trade.pair} দিয়ে আগেরটা বন্ধ করুন।"
-            )
+            if entry.trades.get(owner) == existing.id:
+                await self._reply(update, f"⚠️ এই সিগন্যাল আগেই নেওয়া হয়েছে ({pair})।")
+            else:
+                await self._reply(
+                    update,
+                    f"⚠️ {pair} ইতিমধ্যে আছে!\n"
+                    f"/close {pair} দিয়ে আগেরটা বন্ধ করুন।"
+                )
             return
         
+        trade = self.parser.build(entry)
+        trade.owner_chat = owner
         self.db.add(trade)
+        entry.trades[owner] = trade.id
         summary = self.parser.format_summary(trade)
         summary += "\n<b>💹 Price Source: CoinDCX API</b>"
         
-        await update.message.reply_text(summary, parse_mode='HTML')
+        await self._reply(update, summary, parse_mode='HTML')
+        await self._ensure_monitor(update)
+    
+    async def handle_document(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Import signals from an uploaded .txt or .csv file"""
+        document = update.message.document
+        if document.file_size and document.file_size > BULK_IMPORT['MAX_FILE_BYTES']:
+            await self._reply(update, "❌ ফাইল অনেক বড়!")
+            return
         
-        if self.monitor is None:
-            self.monitor = TradeMonitor(BOT_TOKEN)
-            asyncio.create_task(self.monitor.monitor_loop())
-            await update.message.reply_text("✅ মনিটরিং শুরু!")
+        file = await document.get_file()
+        data = await file.download_as_bytearray()
+        await self._import(update, data.decode('utf-8-sig', errors='replace'))
     
-    async def status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        active = self.db.get_active()
+    async def _import(self, update: Update, text: str):
+        """Parse, validate and insert many signals with one save and one reply"""
+        owner = str(update.effective_chat.id)
+        trades, errors = await asyncio.to_thread(self.parser.parse_many, text)
         
-        if not active:
-            await update.message.reply_text("কোনো অ্যাক্টিভ ট্রেড নেই।")
+        if len(trades) > BULK_IMPORT['MAX_SIGNALS']:
+            await self._reply(update, f"❌ সর্বোচ্চ {BULK_IMPORT['MAX_SIGNALS']}টি সিগন্যাল একসাথে।")
             return
         
-        msg = "📊 <b>অ্যাক্টিভ ট্রেডস:</b>\n\n"
+        added, duplicates, seen = [], [], set()
+        for trade in trades:
+            trade.owner_chat = owner
+            if trade.pair in seen or self.db.get_by_pair(trade.pair, owner):
+                duplicates.append(trade.pair)
+                continue
+            seen.add(trade.pair)
+            added.append(trade)
         
-        for t in active:
-            emoji = "🟢" if t.direction == "LONG" else "🔴"
-            tp_status = "🥉 TP3" if t.tp3_hit else "🥈 TP2" if t.tp2_hit else "🥇 TP1" if t.tp1_hit else "⏳ পেন্ডিং"
-            
-            msg += f"{emoji} <b>{t.pair}</b> | {tp_status}\n"
-            msg += f"   এন্ট্রি: ${t.entry_avg:.4f}\n"
-            msg += f"   SL: ${t.current_sl:.4f}\n"
-            msg += f"   Next TP: ${t.current_tp:.4f if t.current_tp else 'ডন'}\n\n"
+        if added:
+            self.db.add_many(added)
         
-        await update.message.reply_text(msg, parse_mode='HTML')
+        msg = f"📥 <b>ইমপোর্ট</b>\n\n✅ যোগ হয়েছে: {len(added)}\n"
+        if duplicates:
+            msg += f"⚠️ আগে থেকেই আছে: {len(duplicates)} ({', '.join(duplicates[:10])})\n"
+        if errors:
+            msg += f"❌ ভুল: {len(errors)}\n"
+            shown = errors[:BULK_IMPORT['MAX_ERRORS_SHOWN']]
+            msg += "\n".join(f"   {html.escape(e)}" for e in shown) + "\n"
+        
+        await self._reply(update, msg, parse_mode='HTML')
+        if added:
+            await self._ensure_monitor(update)
     
-    async def history(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        closed = self.db.get_closed()
+    async def _ensure_monitor(self, update: Update):
+        async with self.monitor_lock:
+            if self.monitor is None:
+                # Construction tests the exchange connection (blocking HTTP)
+                self.monitor = await asyncio.to_thread(
+                    TradeMonitor, BOT_TOKEN, self.db, self.dashboard, self.subscribers, limiter=self.limiter
+                )
+                self.monitor_task = asyncio.create_task(self.monitor.monitor_loop())
+                await self._reply(update, "✅ মনিটরিং শুরু!")
+    
+    async def status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        msg = self.views.status(update.effective_chat.id)
         
-        if not closed:
-            await update.message.reply_text("কোনো হিস্টরি নেই।")
+        if not msg:
+            await self._reply(update, "কোনো অ্যাক্টিভ ট্রেড নেই।")
             return
         
-        msg = "📜 <b>ক্লোজড ট্রেডস:</b>\n\n"
+        await self._reply(update, msg, parse_mode='HTML')
+    
+    async def history(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        msg, keyboard = self.views.history(update.effective_chat.id)
+        
+        if not msg:
+            await self._reply(update, "কোনো হিস্টরি নেই।")
+            return
         
-        for t in closed[-5:]:
-            emoji = "✅" if t.tp1_hit else "❌"
-            msg += f"{emoji} {t.pair} ({t.direction})\n"
-            if t.tp1_hit:
-                msg += f"   TP1: {t.tp1_closed_percent}%\n"
-            if t.tp2_hit:
-                msg += f"   TP2: {t.tp2_closed_percent}%\n"
-            if t.tp3_hit:
-                msg += f"   TP3: {t.tp3_closed_percent}%\n"
-            msg += "\n"
+        await self._reply(update, msg, parse_mode='HTML', reply_markup=keyboard)
+    
+    async def history_page(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Inline ◀️/▶️ buttons of /history"""
+        query = update.callback_query
+        await query.answer()
         
-        await update.message.reply_text(msg, parse_mode='HTML')
+        msg, keyboard = self.views.history(update.effective_chat.id, query.data.split(':', 1)[1])
+        if msg:
+            await self.limiter.call(update.effective_chat.id, query.edit_message_text,
+                                    msg, parse_mode='HTML', reply_markup=keyboard)
     
     async def close_trade(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         if not context.args:
-            await update.message.reply_text("ব্যবহার: /close SEIUSDT")
+            await self._reply(update, "ব্যবহার: /close SEIUSDT")
             return
         
         symbol = context.args[0].upper()
-        self.db.close_all(symbol)
-        await update.message.reply_text(f"✅ {symbol} বন্ধ করা হয়েছে।")
+        self.db.close_all(symbol, str(update.effective_chat.id))
+        await self._reply(update, f"✅ {symbol} বন্ধ করা হয়েছে।")
+    
+    async def dashboard_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        chat_id = update.effective_chat.id
+        
+        if context.args and context.args[0].lower() == 'off':
+            await self.dashboard.close(chat_id)
+            await self._reply(update, "📌 ড্যাশবোর্ড বন্ধ।")
+            return
+        
+        # A new message each time, so it can be brought back to the bottom
+        await self.dashboard.close(chat_id)
+        await self.dashboard.open(chat_id)
+    
+    async def subscribe(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/subscribe [all] [PAIR ...]: own trades, or with `all` every chat's trades on the pairs"""
+        args = list(context.args or [])
+        follow_all = None
+        if args and args[0].lower() in ('all', 'own'):
+            follow_all = args.pop(0).lower() == 'all'
+        sub = self.subscribers.subscribe(update.effective_chat.id, args or None, follow_all)
+        following = ", ".join(sub.pairs) if sub.pairs else "সব পেয়ার"
+        scope = "সবার ট্রেড" if sub.follow_all else "নিজের ট্রেড"
+        await self._reply(update, f"🔔 সাবস্ক্রাইবড: {following} ({scope})")
+    
+    async def unsubscribe(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if self.subscribers.unsubscribe(update.effective_chat.id):
+            await self._reply(update, "🔕 আনসাবস্ক্রাইবড।")
+        else:
+            await self._reply(update, "এই চ্যাট সাবস্ক্রাইবড নয়।")
+    
+    async def alert_settings(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/alerts [pairs ALL|PAIR ...] [severity LEVEL] [danger on|off] [lang bn|en]"""
+        chat_id = update.effective_chat.id
+        if self.subscribers.get(chat_id) is None:
+            await self._reply(update, "আগে /subscribe করুন।")
+            return
+        
+        args = context.args
+        if args:
+            setting, values = args[0].lower(), args[1:]
+            if setting == 'pairs' and values:
+                pairs = [] if values[0].upper() == 'ALL' else sorted({v.upper() for v in values})
+                self.subscribers.update(chat_id, pairs=pairs)
+            elif setting == 'severity' and values and values[0].upper() in ALERT_SEVERITY_LEVELS:
+                self.subscribers.update(chat_id, min_severity=values[0].upper())
+            elif setting == 'danger' and values and values[0].lower() in ('on', 'off'):
+                self.subscribers.update(chat_id, mute_danger=values[0].lower() == 'off')
+            elif setting == 'lang' and values:
+                self.subscribers.update(chat_id, locale=values[0].lower())
+            else:
+                await self._reply(
+                    update,
+                    "ব্যবহার:\n/alerts pairs ALL|BTCUSDT ...\n"
+                    f"/alerts severity {'|'.join(ALERT_SEVERITY_LEVELS)}\n"
+                    "/alerts danger on|off\n/alerts lang bn|en"
+                )
+                return
+        
+        sub = self.subscribers.get(chat_id)
+        await self._reply(
+            update,
+            f"🔔 <b>অ্যালার্ট সেটিংস</b>\n\n"
+            f"পেয়ার: {', '.join(sub.pairs) if sub.pairs else 'সব'}\n"
+            f"মিনিমাম: {sub.min_severity}\n"
+            f"ডেঞ্জার: {'বন্ধ' if sub.mute_danger else 'চালু'}\n"
+            f"ভাষা: {sub.locale}\n"
+            f"ট্রেড: {'সবার' if sub.follow_all else 'নিজের'}",
+            parse_mode='HTML'
+        )
     
     async def stop_monitor(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         if self.monitor:
             self.monitor.stop()
             self.monitor = None
+            self.monitor_task = None
         
-        await update.message.reply_text("🛑 মনিটরিং বন্ধ।")
+        await self._reply(update, "🛑 মনিটরিং বন্ধ।")
     
     async def run(self):
         """Run bot with webhook"""
@@ -137,15 +286,25 @@ class TelegramBot:
         print(f"🔗 Webhook path: {self.webhook_path}")
         
         # Build application
-        self.application = Application.builder().token(BOT_TOKEN).build()
+        self.application = (Application.builder().token(BOT_TOKEN)
+                            .base_url(TELEGRAM_BOT_URL).base_file_url(TELEGRAM_FILE_URL).build())
         
         # Add handlers
         self.application.add_handler(CommandHandler("start", self.start))
         self.application.add_handler(CommandHandler("status", self.status))
         self.application.add_handler(CommandHandler("history", self.history))
+        self.application.add_handler(CallbackQueryHandler(self.history_page, pattern=r'^hist:'))
         self.application.add_handler(CommandHandler("close", self.close_trade))
+        self.application.add_handler(CommandHandler("dashboard", self.dashboard_command))
+        self.application.add_handler(CommandHandler("subscribe", self.subscribe))
+        self.application.add_handler(CommandHandler("unsubscribe", self.unsubscribe))
+        self.application.add_handler(CommandHandler("alerts", self.alert_settings))
         self.application.add_handler(CommandHandler("stop", self.stop_monitor))
         self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_signal))
+        self.application.add_handler(MessageHandler(
+            filters.Document.FileExtension("txt") | filters.Document.FileExtension("csv"),
+            self.handle_document
+        ))
         
         # Initialize
         await self.application.initialize()
@@ -155,15 +314,28 @@ class TelegramBot:
         webhook_full_url = f"{WEBHOOK_URL}{self.webhook_path}"
         await self.application.bot.set_webhook(
             url=webhook_full_url,
-            drop_pending_updates=True
+            drop_pending_updates=True,
+            secret_token=WEBHOOK_SECRET
         )
         print(f"✅ Webhook set: {webhook_full_url}")
         
+        # Update workers
+        workers = [asyncio.create_task(self._update_worker()) for _ in range(WEBHOOK['WORKERS'])]
+        workers.append(asyncio.create_task(self.watchdog.run()))
+        
+        # Live dashboard
+        self.dashboard = Dashboard(self.application.bot, self.db, limiter=self.limiter)
+        workers.append(asyncio.create_task(self.dashboard.run()))
+        
         # Create aiohttp app
         web_app = web.Application()
         web_app.router.add_post(self.webhook_path, self._handle_webhook)
         web_app.router.add_get('/', self._health_check)
         web_app.router.add_get('/health', self._health_check)
+        web_app.router.add_get('/metrics', self._metrics)
+        metrics.ACTIVE_TRADES.set_function(lambda: len(self.db.get_active()))
+        metrics.WEBHOOK_QUEUE.set_function(self.updates.qsize)
+        metrics.MONITOR_CYCLE_AGE.set_function(lambda: self._monitor_health()['last_cycle_age_seconds'] or 0)
         
         # Start server
         runner = web.AppRunner(web_app)
@@ -178,21 +350,101 @@ class TelegramBot:
             while True:
                 await asyncio.sleep(3600)
         finally:
+            self.watchdog.stop()
+            for task in workers:
+                task.cancel()
             await runner.cleanup()
             await self.application.stop()
             await self.application.shutdown()
     
     async def _handle_webhook(self, request):
-        """Handle Telegram webhook"""
+        """Validate and enqueue a Telegram update, then acknowledge at once"""
+        if WEBHOOK_SECRET and request.headers.get('X-Telegram-Bot-Api-Secret-Token') != WEBHOOK_SECRET:
+            return web.Response(status=403)
+        
         try:
             data = await request.json()
+            update_id = data['update_id']
             update = Update.de_json(data, self.application.bot)
-            await self.application.process_update(update)
-            return web.Response(status=200)
         except Exception as e:
-            print(f"❌ Webhook error: {e}")
-            return web.Response(status=500)
+            print(f"❌ Bad webhook payload: {e}")
+            return web.Response(status=400)
+        
+        # Telegram redelivers when it did not get a 200 in time
+        if update_id in self.seen_updates:
+            return web.Response(status=200)
+        
+        try:
+            self.updates.put_nowait(update)
+        except asyncio.QueueFull:
+            # Let Telegram retry later instead of losing the update
+            print(f"⚠️ Update queue full, deferring {update_id}")
+            return web.Response(status=503)
+        
+        self.seen_updates[update_id] = True
+        if len(self.seen_updates) > WEBHOOK['DEDUP_SIZE']:
+            self.seen_updates.popitem(last=False)
+        
+        return web.Response(status=200)
+    
+    async def _update_worker(self):
+        """Process queued updates in the background"""
+        while True:
+            update = await self.updates.get()
+            try:
+                await self.application.process_update(update)
+            except Exception as e:
+                print(f"❌ Update {update.update_id} error: {e}")
+            finally:
+                self.updates.task_done()
+    
+    async def _metrics(self, request):
+        """Prometheus scrape endpoint"""
+        return web.Response(body=metrics.render().encode('utf-8'),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+    
+    def _monitor_health(self) -> dict:
+        if not self.monitor:
+            # Not started yet (no trades) or stopped with /stop
+            return {'running': False, 'last_cycle_age_seconds': None, 'error': None}
+        
+        error = None
+        if self.monitor_task and self.monitor_task.done():
+            crash = None if self.monitor_task.cancelled() else self.monitor_task.exception()
+            error = f"monitor task exited: {crash!r}" if crash else "monitor task exited"
+        
+        if not error and self.monitor.running and not self.monitor.outbox_alive():
+            error = "alert outbox task not running"
+        
+        last_cycle = self.monitor.last_cycle
+        age = self.monitor.clock.monotonic() - last_cycle if last_cycle is not None else None
+        if not error and age is not None and age > WATCHDOG['STALE_AFTER']:
+            error = f"no monitor cycle for {age:.0f}s"
+        
+        return {
+            'running': self.monitor.running,
+            'last_cycle_age_seconds': round(age, 1) if age is not None else None,
+            'cycles': self.monitor.cycle_stats['cycles'],
+            'last_cycle_ms': round(self.monitor.cycle_stats['last_ns'] / 1e6, 1),
+            'outbox_running': self.monitor.outbox_alive(),
+            'outbox_buffered': len(self.monitor.outbox.buffers),
+            'outbox_queue': self.monitor.outbox.queue.qsize(),
+            'error': error,
+        }
     
     async def _health_check(self, request):
-        """Health check for Railway"""
-        return web.Response(text="✅ Bot is healthy!", status=200)
+        """Deep health check for Railway: 503 when the monitor died or stalled"""
+        monitor = self._monitor_health()
+        problems = [monitor['error']] if monitor['error'] else []
+        if not self.watchdog.running:
+            problems.append("loop watchdog not running")
+        
+        health = {
+            'status': 'unhealthy' if problems else 'healthy',
+            'problems': problems,
+            'monitor': monitor,
+            'event_loop': self.watchdog.snapshot(),
+            'active_trades': len(self.db.get_active()),
+            'webhook_queue': self.updates.qsize(),
+        }
+        return web.json_response(health, status=503 if problems else 200)
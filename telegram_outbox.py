@@ -0,0 +1,300 @@
+# telegram_outbox.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from telegram import Bot
+from telegram.error import RetryAfter
+from config import TELEGRAM_LIMITS, ALERT_DELIVERY
+from clock import Clock, real_clock
+from metrics import TELEGRAM_SEND, TELEGRAM_429
+
+SEPARATOR = "\n━━━━━━━━━━━━━━\n"
+
+
+def pack_message(parts: List[str], limit: int = TELEGRAM_LIMITS['MAX_MESSAGE_LENGTH']) -> List[Tuple[str, List[int]]]:
+    """Join parts into as few messages as possible, each at most `limit` chars
+    
+    Returns (text, indexes of the parts it carries) per message.
+    """
+    messages = []
+    current, members = "", []
+
+    for index, part in enumerate(parts):
+        # A single oversized part is cut at line boundaries
+        while len(part) > limit:
+            cut = part.rfind("\n", 0, limit)
+            if cut <= 0:
+                cut = limit
+            if current:
+                messages.append((current, members))
+                current, members = "", []
+            messages.append((part[:cut], [index]))
+            part = part[cut:]
+
+        candidate = current + SEPARATOR + part if current else part
+        if len(candidate) <= limit:
+            current = candidate
+        else:
+            messages.append((current, members))
+            current, members = part, []
+        members.append(index)
+
+    if current:
+        messages.append((current, members))
+    return messages
+
+
+def split_message(parts: List[str], limit: int = TELEGRAM_LIMITS['MAX_MESSAGE_LENGTH']) -> List[str]:
+    """Join parts into as few messages as possible, each at most `limit` chars"""
+    return [text for text, _ in pack_message(parts, limit)]
+
+
+class RateLimiter:
+    """Reserve send slots under Telegram's global and per-chat limits"""
+
+    def __init__(self, global_per_second: float = TELEGRAM_LIMITS['GLOBAL_PER_SECOND'],
+                 chat_per_second: float = TELEGRAM_LIMITS['CHAT_PER_SECOND'],
+                 group_per_minute: float = TELEGRAM_LIMITS['GROUP_PER_MINUTE'],
+                 clock: Optional[Clock] = None):
+        self.clock = clock or real_clock
+        self.global_interval = 1 / global_per_second
+        self.chat_interval = 1 / chat_per_second
+        self.group_interval = 60 / group_per_minute
+        self._next_global = 0.0
+        self._next_chat: Dict[str, float] = {}
+
+    def _interval(self, chat_id) -> float:
+        # Group and channel ids are negative
+        return self.group_interval if str(chat_id).startswith('-') else self.chat_interval
+
+    async def acquire(self, chat_id):
+        """Wait for the next free slot of this chat, then claim a global one
+        
+        A chat waiting for its own slot or a 429 penalty holds no global
+        slot, so one throttled chat never delays the others.
+        """
+        chat = str(chat_id)
+        # Reserve before awaiting so concurrent senders to a chat get distinct slots
+        now = self.clock.monotonic()
+        start = max(now, self._next_chat.get(chat, 0.0))
+        self._next_chat[chat] = start + self._interval(chat_id)
+        if start > now:
+            await self.clock.async_sleep(start - now)
+
+        # The global budget is claimed only once this chat may send
+        now = self.clock.monotonic()
+        start = max(now, self._next_global)
+        self._next_global = start + self.global_interval
+        if start > now:
+            await self.clock.async_sleep(start - now)
+
+    async def call(self, chat_id, request, *args, **kwargs):
+        """Run a Bot API call (reply, edit, ...) in this chat's next slot, retrying after 429s"""
+        for attempt in range(TELEGRAM_LIMITS['MAX_RETRIES']):
+            await self.acquire(chat_id)
+            try:
+                return await request(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == TELEGRAM_LIMITS['MAX_RETRIES'] - 1:
+                    raise
+                self.penalize(chat_id, getattr(e.retry_after, 'total_seconds', lambda: e.retry_after)())
+    
+    def penalize(self, chat_id, seconds: float):
+        """Block a chat after Telegram answered 429 with retry_after"""
+        until = self.clock.monotonic() + seconds
+        self._next_chat[str(chat_id)] = max(self._next_chat.get(str(chat_id), 0.0), until)
+
+
+class TelegramOutbox:
+    """Coalesce alerts per chat/trade and deliver them within rate limits
+    
+    add() only buffers, so callers never wait on Telegram. A flusher moves
+    due buffers into a bounded queue that sender workers drain; when the
+    queue is full the flusher waits and buffers keep coalescing.
+    """
+
+    def __init__(self, bot: Bot, limiter: Optional[RateLimiter] = None,
+                 window: float = TELEGRAM_LIMITS['COALESCE_WINDOW'],
+                 workers: int = ALERT_DELIVERY['WORKERS'],
+                 queue_size: int = ALERT_DELIVERY['QUEUE_SIZE'],
+                 clock: Optional[Clock] = None):
+        self.bot = bot
+        self.clock = clock or real_clock
+        self.limiter = limiter or RateLimiter(clock=self.clock)
+        self.window = window
+        self.workers = workers
+        self.buffers: "OrderedDict[tuple, dict]" = OrderedDict()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.running = False
+        # Set by add()/stop() so an idle flusher sleeps instead of polling
+        self.wakeup = asyncio.Event()
+        self.in_flight = 0
+        # Called with the alert ids carried by a message once it is sent / given up
+        self.on_delivered: Optional[Callable[[List[str]], None]] = None
+        self.on_failed: Optional[Callable[[List[str]], None]] = None
+        # Alert id -> pieces still unsent / whether one failed, for alerts split by pack_message
+        self.pieces: Dict[str, dict] = {}
+        self.stats = {
+            'queued': 0,
+            'sent': 0,
+            'merged': 0,
+            'failed': 0,
+            'rate_limited': 0,
+            'queue_high_watermark': 0,
+            'enqueue_waits': 0,
+            'enqueue_wait_seconds': 0.0,
+            'send_seconds': 0.0,
+        }
+
+    def add(self, chat_id, text: str, key: Optional[str] = None, alert_id: Optional[str] = None):
+        """Queue a message; messages with the same chat and key are merged"""
+        buffer_key = (str(chat_id), key)
+        buffer = self.buffers.get(buffer_key)
+        if buffer is None:
+            self.buffers[buffer_key] = {
+                'chat_id': chat_id,
+                'since': self.clock.monotonic(),
+                'parts': [text],
+                'ids': [alert_id],
+            }
+        else:
+            buffer['parts'].append(text)
+            buffer['ids'].append(alert_id)
+            self.stats['merged'] += 1
+        self.stats['queued'] += 1
+        self.wakeup.set()
+
+    def _pop_due(self, force: bool = False) -> List[tuple]:
+        now = self.clock.monotonic()
+        due = [
+            key for key, buffer in self.buffers.items()
+            if force or now - buffer['since'] >= self.window
+        ]
+        return [(key, self.buffers.pop(key)) for key in due]
+
+    async def flush(self, force: bool = False):
+        """Hand every buffer whose coalescing window has passed to the senders"""
+        for key, buffer in self._pop_due(force):
+            packed = [(text, [buffer['ids'][i] for i in members if buffer['ids'][i]])
+                      for text, members in pack_message(buffer['parts'])]
+            for _, ids in packed:
+                for alert_id in ids:
+                    state = self.pieces.setdefault(alert_id, {'left': 0, 'failed': False})
+                    state['left'] += 1
+            for text, ids in packed:
+                await self._enqueue((buffer['chat_id'], text, ids))
+
+    async def _enqueue(self, item: tuple):
+        if self.queue.full():
+            # Backpressure: senders are behind
+            started = self.clock.monotonic()
+            await self.queue.put(item)
+            self.stats['enqueue_waits'] += 1
+            self.stats['enqueue_wait_seconds'] += self.clock.monotonic() - started
+        else:
+            self.queue.put_nowait(item)
+        self.stats['queue_high_watermark'] = max(self.stats['queue_high_watermark'], self.queue.qsize())
+
+    async def _sender(self):
+        while True:
+            chat_id, text, ids = await self.queue.get()
+            self.in_flight += 1
+            started = self.clock.monotonic()
+            try:
+                try:
+                    delivered = await self.send(chat_id, text)
+                except Exception as e:
+                    print(f"❌ Sender error: {e}")
+                    delivered = False
+                done, failed = self._settle(ids, delivered)
+                if done and self.on_delivered:
+                    self.on_delivered(done)
+                if failed and self.on_failed:
+                    self.on_failed(failed)
+            except Exception as e:
+                print(f"❌ Sender error: {e}")
+            finally:
+                self.stats['send_seconds'] += self.clock.monotonic() - started
+                self.in_flight -= 1
+                self.queue.task_done()
+
+    def _settle(self, ids: List[str], delivered: bool) -> Tuple[List[str], List[str]]:
+        """Count one sent piece; return the alerts now fully delivered / failed
+        
+        An alert split over several messages is delivered only once all its
+        pieces are, and reported failed (once) after its last piece settles.
+        """
+        done, failed = [], []
+        for alert_id in ids:
+            state = self.pieces.get(alert_id)
+            if state is None:
+                (done if delivered else failed).append(alert_id)
+                continue
+            state['left'] -= 1
+            state['failed'] = state['failed'] or not delivered
+            if state['left'] <= 0:
+                del self.pieces[alert_id]
+                (failed if state['failed'] else done).append(alert_id)
+        return done, failed
+    
+    async def send(self, chat_id, text: str) -> bool:
+        """Send one message, honouring rate limits and retry_after"""
+        for attempt in range(TELEGRAM_LIMITS['MAX_RETRIES']):
+            await self.limiter.acquire(chat_id)
+            started = time.perf_counter()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text, parse_mode='HTML')
+                TELEGRAM_SEND.observe(time.perf_counter() - started, 'ok')
+                self.stats['sent'] += 1
+                return True
+            except RetryAfter as e:
+                retry_after = getattr(e.retry_after, 'total_seconds', lambda: e.retry_after)()
+                TELEGRAM_SEND.observe(time.perf_counter() - started, 'rate_limited')
+                TELEGRAM_429.inc()
+                self.stats['rate_limited'] += 1
+                print(f"⏳ Telegram 429 for {chat_id}, retry in {retry_after}s")
+                self.limiter.penalize(chat_id, retry_after)
+            except Exception as e:
+                TELEGRAM_SEND.observe(time.perf_counter() - started, 'error')
+                print(f"❌ Telegram error: {e}")
+                break
+
+        self.stats['failed'] += 1
+        return False
+
+    async def run(self, interval: float = 0.25):
+        """Run the flusher and sender workers; drains what is left when stopped"""
+        self.running = True
+        senders = [asyncio.create_task(self._sender()) for _ in range(self.workers)]
+        try:
+            while self.running:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    print(f"❌ Outbox error: {e}")
+                if self.buffers:
+                    await self.clock.async_sleep(interval)
+                else:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+            await self.flush(force=True)
+            await self.queue.join()
+        finally:
+            for task in senders:
+                task.cancel()
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+
+    def metrics(self) -> dict:
+        """Delivery and backpressure counters"""
+        return {
+            **self.stats,
+            'buffered': len(self.buffers),
+            'queue_depth': self.queue.qsize(),
+            'queue_size': self.queue.maxsize,
+            'in_flight': self.in_flight,
+            'workers': self.workers,
+        }
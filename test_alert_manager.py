@@ -0,0 +1,64 @@
+# test_alert_manager.py
+"""Same-tick SL/TP ordering in AlertManager.check_alerts
+
+    python -m pytest test_alert_manager.py
+"""
+import os
+from datetime import datetime
+
+# config validates these at import
+os.environ.setdefault('BOT_TOKEN', '123456:TEST')
+os.environ.setdefault('CHAT_ID', '1')
+
+from alert_manager import AlertManager
+from database import Trade
+
+
+def make_trade(status: str = 'ACTIVE') -> Trade:
+    return Trade(
+        id='t1', pair='BTCUSDT', direction='LONG',
+        entry_min=99, entry_max=101, tp1=105, tp2=110, tp3=115, stop_loss=95,
+        risk_percent=1.0, leverage="1-2x", valid_hours=4, strength=50,
+        created_at=datetime.utcnow(),
+        breakeven_price=100, current_sl=95, status=status,
+        entry_price=100 if status == 'ACTIVE' else None,
+    )
+
+
+def types(events) -> list:
+    return [event.type for event in events]
+
+
+def test_tp1_and_dip_in_one_tick_do_not_stop_out_at_breakeven():
+    trade = make_trade()
+    events = AlertManager(profile=False).check_alerts(trade, 105.5, high=106, low=99.5)
+    assert types(events)[:3] == ['TP1_HIT', 'BE_MOVE', 'AFTER_TP1']
+    assert 'SL_HIT' not in types(events)
+    assert trade.status == 'TP1'
+    assert trade.current_sl == 100
+
+
+def test_pending_trade_through_entry_and_tp1_stays_open():
+    trade = make_trade('PENDING')
+    events = AlertManager(profile=False).check_alerts(trade, 103, high=106, low=100)
+    assert 'ENTRY_ZONE' in types(events)
+    assert 'TP1_HIT' in types(events)
+    assert 'SL_HIT' not in types(events)
+    assert trade.status == 'TP1'
+
+
+def test_moved_stop_is_hit_by_the_last_price():
+    trade = make_trade()
+    events = AlertManager(profile=False).check_alerts(trade, 99.8, high=106, low=99.5)
+    sl_hit = [event for event in events if event.type == 'SL_HIT']
+    assert sl_hit and sl_hit[0].metrics['sl'] == 100
+    assert sl_hit[0].metrics['touch'] == 99.8
+    assert trade.status == 'CLOSED'
+
+
+def test_original_stop_hit_in_the_range_closes_at_that_stop():
+    trade = make_trade()
+    events = AlertManager(profile=False).check_alerts(trade, 105.5, high=106, low=94)
+    assert 'SL_HIT' in types(events)
+    assert trade.status == 'CLOSED'
+    assert trade.current_sl == 95
@@ -1,20 +1,66 @@
 # trade_monitor.py
 import asyncio
+import json
+import time
+from datetime import timezone
+from collections import deque
+from typing import Dict, List, Optional, Tuple
 from database import TradeDatabase, Trade
-from alert_manager import AlertManager
+from alert_manager import AlertManager, PairTick
+from alert_renderer import AlertRenderer
+from telegram_outbox import TelegramOutbox, RateLimiter
+from dashboard import Dashboard
+from subscribers import SubscriberRegistry
 from telegram import Bot
-from config import CHAT_ID, CHECK_INTERVAL
+from config import (CHAT_ID, CHECK_INTERVAL, USE_PRICE_RANGE, PROFILE_FILE, ALERT_DELIVERY, DASHBOARD,
+                    TELEGRAM_BOT_URL, TELEGRAM_FILE_URL)
 from coindcx_api import coindcx
+from clock import Clock, real_clock
+from metrics import MONITOR_CYCLE, ALERTS, ALERT_LATENCY
 
 class TradeMonitor:
-    def __init__(self, telegram_token: str):
-        self.db = TradeDatabase()
-        self.alerts = AlertManager()
-        self.telegram = Bot(token=telegram_token)
+    def __init__(self, telegram_token: str, db: Optional[TradeDatabase] = None,
+                 dashboard: Optional[Dashboard] = None,
+                 subscribers: Optional[SubscriberRegistry] = None,
+                 clock: Optional[Clock] = None, prices=None, bot: Optional[Bot] = None,
+                 limiter: Optional[RateLimiter] = None):
+        # Share the bot's database so there is a single writer of trades.json
+        self.db = db or TradeDatabase()
+        self.dashboard = dashboard
+        self.subscribers = subscribers or SubscriberRegistry()
+        # Replays pass a VirtualClock, a candle price source and a recording bot
+        self.clock = clock or real_clock
+        self.prices = prices or coindcx
+        self.alerts = AlertManager(clock=self.clock)
+        self.renderer = AlertRenderer()
+        self.telegram = bot or Bot(token=telegram_token, base_url=TELEGRAM_BOT_URL,
+                                   base_file_url=TELEGRAM_FILE_URL)
+        # The bot passes its RateLimiter so alerts, replies and dashboard edits share one budget
+        self.outbox = TelegramOutbox(self.telegram, limiter=limiter, clock=self.clock)
+        self.outbox.on_delivered = self._on_delivered
+        self.outbox.on_failed = self._on_failed
+        self.outbox_task: Optional[asyncio.Task] = None
+        # Delivery callbacks only mark trades dirty; saved once per loop pass
+        self.db_dirty = False
+        self.in_flight: Dict[str, Trade] = {}
         self.running = False
+        self.last_poll: Dict[str, int] = {}
+        self.cycle_stats = {
+            'cycles': 0,
+            'trades': 0,
+            'pairs': 0,
+            'total_ns': 0,
+            'max_ns': 0,
+            'last_ns': 0,
+        }
+        # Recent samples for percentiles (load tests, metrics)
+        self.cycle_times: deque = deque(maxlen=1000)       # cycle durations, ns
+        self.alert_latency: deque = deque(maxlen=1000)     # seconds from check to delivery
+        # Clock time of the last completed loop pass (idle or cycle), for /health
+        self.last_cycle: Optional[float] = None
         
         # Test CoinDCX connection
-        if coindcx.test_connection():
+        if self.prices.test_connection():
             print("✅ CoinDCX API connected!")
         else:
             print("⚠️ Using backup price sources")
@@ -22,81 +68,261 @@ class TradeMonitor:
     async def get_price(self, symbol: str) -> float:
         """Get price from CoinDCX"""
         try:
-            price = await asyncio.to_thread(coindcx.get_price, symbol)
+            price = await self.clock.run_blocking(self.prices.get_price, symbol)
             return price
         except Exception as e:
             print(f"❌ Price error for {symbol}: {e}")
             return 0.0
     
+    async def get_price_range(self, symbol: str, since_ms: int,
+                              until_ms: int) -> Tuple[Optional[float], Optional[float]]:
+        """Get high/low traded since the previous poll"""
+        try:
+            return await self.clock.run_blocking(self.prices.get_price_range, symbol, since_ms, until_ms)
+        except Exception as e:
+            print(f"❌ Range error for {symbol}: {e}")
+            return None, None
+    
     async def monitor_loop(self):
         """Main monitoring loop"""
         self.running = True
+        self.last_cycle = self.clock.monotonic()
+        self._ensure_outbox()
         
         # Send startup message
-        try:
-            await self.telegram.send_message(
-                chat_id=CHAT_ID,
-                text="🤖 <b>Trade Monitor Started!</b>\n\nMonitoring active trades...",
-                parse_mode='HTML'
-            )
-        except Exception as e:
-            print(f"⚠️ Startup message failed: {e}")
+        self.outbox.add(CHAT_ID, "🤖 <b>Trade Monitor Started!</b>\n\nMonitoring active trades...")
         
-        while self.running:
-            try:
-                active_trades = self.db.get_active()
-                
-                if not active_trades:
-                    print("⏳ No active trades...")
-                    await asyncio.sleep(CHECK_INTERVAL)
-                    continue
-                
-                print(f"🔍 Monitoring {len(active_trades)} trades...")
-                
-                for trade in active_trades:
-                    current_price = await self.get_price(trade.pair)
+        try:
+            while self.running:
+                try:
+                    self._ensure_outbox()
+                    self._flush_db()
                     
-                    if current_price == 0:
-                        print(f"⚠️ Could not get price for {trade.pair}")
+                    # Re-send stored alerts: left over from a restart or due for retry
+                    self._retry_pending()
+                    
+                    active_trades = self.db.get_active()
+                    
+                    if not active_trades:
+                        print("⏳ No active trades...")
+                        self.last_cycle = self.clock.monotonic()
+                        await self.clock.async_sleep(CHECK_INTERVAL)
                         continue
                     
-                    # Check all alerts
-                    alert_messages = self.alerts.check_alerts(trade, current_price)
+                    print(f"🔍 Monitoring {len(active_trades)} trades...")
+                    cycle_started = time.perf_counter_ns()
                     
-                    # Send to Telegram
-                    for msg in alert_messages:
-                        try:
-                            await self.telegram.send_message(
-                                chat_id=CHAT_ID,
-                                text=msg,
-                                parse_mode='HTML'
-                            )
-                            print(f"✅ Alert: {trade.pair} - {msg[:40]}...")
-                        except Exception as e:
-                            print(f"❌ Telegram error: {e}")
+                    # One price (and range) fetch per pair
+                    by_pair: Dict[str, list] = {}
+                    for trade in active_trades:
+                        by_pair.setdefault(trade.pair, []).append(trade)
+                    # A pair that comes back later must not see the range of the gap
+                    for pair in [p for p in self.last_poll if p not in by_pair]:
+                        del self.last_poll[pair]
                     
-                    # Update database
-                    self.db.update(trade)
+                    for pair, trades in by_pair.items():
+                        poll_ms = int(self.clock.time() * 1000)
+                        current_price = await self.get_price(pair)
+                        
+                        if current_price == 0:
+                            print(f"⚠️ Could not get price for {pair}")
+                            continue
+                        
+                        high = low = None
+                        since_ms = self.last_poll.get(pair)
+                        if since_ms:
+                            # Never before the pair's oldest signal (added during the interval)
+                            created = min(t.created_at for t in trades).replace(tzinfo=timezone.utc)
+                            since_ms = max(since_ms, int(created.timestamp() * 1000))
+                        if USE_PRICE_RANGE and since_ms and since_ms < poll_ms:
+                            high, low = await self.get_price_range(pair, since_ms, poll_ms)
+                        self.last_poll[pair] = poll_ms
+                        
+                        # Window stats are computed once per pair and shared by its trades
+                        tick = self.alerts.pair_tick(pair, current_price, high, low)
+                        await self._check_trades(trades, tick)
                     
-                    # Console log
-                    status_icon = {
-                        'PENDING': '⏳',
-                        'ACTIVE': '🟢',
-                        'TP1': '🥇',
-                        'TP2': '🥈',
-                        'TP3': '🥉',
-                        'CLOSED': '🔴',
-                        'EXPIRED': '⚪'
-                    }.get(trade.status, '⚪')
+                    self._record_cycle(cycle_started, len(active_trades), len(by_pair))
+                    await self.clock.async_sleep(CHECK_INTERVAL)
                     
-                    print(f"{status_icon} {trade.pair}: ${current_price:.6f} | {trade.status}")
-                
-                await asyncio.sleep(CHECK_INTERVAL)
-                
+                except Exception as e:
+                    print(f"❌ Monitor error: {e}")
+                    await self.clock.async_sleep(30)
+            
+            # stop() told the outbox to drain; deliver what is left before returning
+            if self.outbox_task:
+                try:
+                    await self.outbox_task
+                except Exception as e:
+                    print(f"❌ Outbox error: {e}")
+            self._flush_db()
+        except asyncio.CancelledError:
+            # Cancelled instead of stopped: do not leave the senders orphaned
+            if self.outbox_task:
+                self.outbox_task.cancel()
+            raise
+        
+    def _ensure_outbox(self):
+        """Start the delivery task, or restart it if it died: alerts would pile up unsent"""
+        task = self.outbox_task
+        if task and not task.done():
+            return
+        if task:
+            error = None if task.cancelled() else task.exception()
+            print(f"⚠️ Outbox task exited ({error!r}), restarting")
+        self.outbox_task = asyncio.create_task(self.outbox.run())
+    
+    def outbox_alive(self) -> bool:
+        return self.outbox_task is not None and not self.outbox_task.done()
+    
+    async def _check_trades(self, trades: list, tick: PairTick):
+        """Evaluate and alert all trades of one pair"""
+        current_price = tick.price
+        for trade in trades:
+            # Check all alerts
+            alert_events = self.alerts.check_alerts(trade, tick)
+            for event in alert_events:
+                ALERTS.inc(event.type)
+            
+            # Render into the trade's durable outbox
+            pending = self._store_alerts(trade, alert_events)
+            
+            # Update database (state change and its alerts in one write)
+            self.db.update(trade)
+            
+            # Hand over for delivery; the outbox merges alerts of this trade
+            for entry in pending:
+                self._dispatch(trade, entry)
+            if pending:
+                print(f"✅ Alerts: {trade.pair} - {', '.join(e.type for e in alert_events)}")
+            
+            # Console log
+            status_icon = {
+                'PENDING': '⏳',
+                'ACTIVE': '🟢',
+                'TP1': '🥇',
+                'TP2': '🥈',
+                'TP3': '🥉',
+                'CLOSED': '🔴',
+                'EXPIRED': '⚪'
+            }.get(trade.status, '⚪')
+            
+            print(f"{status_icon} {trade.pair}: ${current_price:.6f} | {trade.status}")
+    
+    # ============ DURABLE DELIVERY ============
+    
+    def _store_alerts(self, trade: Trade, events: list) -> List[dict]:
+        """Fan events out to matching subscribers, rendering once per locale"""
+        if not events:
+            return []
+        known = {entry['id'] for entry in trade.outbox}
+        subscribers = self.subscribers.for_trade(trade.owner_chat, trade.pair)
+        
+        targets = []
+        by_locale: Dict[str, dict] = {}
+        for event in events:
+            for sub in subscribers:
+                entry_id = f"{event.id}@{sub.chat_id}"
+                if entry_id in known or not sub.wants(event.type):
+                    continue
+                if self.dashboard and self.dashboard.is_active(sub.chat_id) \
+                        and event.type in DASHBOARD['QUIET_ALERTS']:
+                    # The pinned dashboard already shows these
+                    continue
+                targets.append((entry_id, event, sub))
+                by_locale.setdefault(sub.locale, {})[event.id] = event
+        
+        texts = {}
+        for locale, needed in by_locale.items():
+            for event, text in zip(needed.values(), self.renderer.render_many(list(needed.values()), trade, locale)):
+                texts[(locale, event.id)] = text
+        
+        entries = [
+            {'id': entry_id, 'chat_id': sub.chat_id, 'text': texts[(sub.locale, event.id)],
+             'attempts': 0, 'next_attempt': 0, 'created': self.clock.time()}
+            for entry_id, event, sub in targets
+        ]
+        trade.outbox.extend(entries)
+        return entries
+    
+    def _dispatch(self, trade: Trade, entry: dict):
+        if entry['id'] in self.in_flight:
+            return
+        self.in_flight[entry['id']] = trade
+        self.outbox.add(entry['chat_id'], entry['text'], key=trade.id, alert_id=entry['id'])
+    
+    def _retry_pending(self):
+        now = self.clock.time()
+        for trade, entry in self.db.get_pending_alerts():
+            if entry['id'] not in self.in_flight and entry['next_attempt'] <= now:
+                self._dispatch(trade, entry)
+    
+    def _on_delivered(self, alert_ids: List[str]):
+        now = self.clock.time()
+        for alert_id in alert_ids:
+            trade = self.in_flight.pop(alert_id, None)
+            if trade:
+                for entry in trade.outbox:
+                    # Entries stored before restarts may lack the creation time
+                    if entry['id'] == alert_id and entry.get('created'):
+                        self.alert_latency.append(now - entry['created'])
+                        ALERT_LATENCY.observe(now - entry['created'])
+                trade.outbox = [entry for entry in trade.outbox if entry['id'] != alert_id]
+                self.db_dirty = True
+    
+    def _on_failed(self, alert_ids: List[str]):
+        now = self.clock.time()
+        for alert_id in alert_ids:
+            trade = self.in_flight.pop(alert_id, None)
+            if not trade:
+                continue
+            for entry in trade.outbox:
+                if entry['id'] == alert_id:
+                    # Exponential backoff; never give up on an alert
+                    delay = min(ALERT_DELIVERY['RETRY_BASE'] * 2 ** entry['attempts'], ALERT_DELIVERY['RETRY_MAX'])
+                    entry['attempts'] += 1
+                    entry['next_attempt'] = now + delay
+                    print(f"🔁 Alert {alert_id} retry #{entry['attempts']} in {delay}s")
+                    self.db_dirty = True
+    
+    def _flush_db(self):
+        """Persist delivery state changed by the outbox callbacks since the last pass"""
+        if self.db_dirty:
+            self.db_dirty = False
+            self.db.save()
+    
+    def _record_cycle(self, started_ns: int, trades: int, pairs: int):
+        elapsed = time.perf_counter_ns() - started_ns
+        stats = self.cycle_stats
+        stats['cycles'] += 1
+        stats['trades'] += trades
+        stats['pairs'] += pairs
+        stats['total_ns'] += elapsed
+        stats['last_ns'] = elapsed
+        self.last_cycle = self.clock.monotonic()
+        self.cycle_times.append(elapsed)
+        MONITOR_CYCLE.observe(elapsed / 1e9)
+        stats['max_ns'] = max(stats['max_ns'], elapsed)
+        
+        if PROFILE_FILE:
+            try:
+                with open(PROFILE_FILE, 'w') as f:
+                    json.dump(self.profile_snapshot(), f, indent=2)
             except Exception as e:
-                print(f"❌ Monitor error: {e}")
-                await asyncio.sleep(30)
+                print(f"⚠️ Profile write failed: {e}")
+    
+    def profile_snapshot(self) -> dict:
+        """Cycle totals plus AlertManager per-rule counters"""
+        cycles = dict(self.cycle_stats)
+        cycles['avg_ns'] = cycles['total_ns'] // cycles['cycles'] if cycles['cycles'] else 0
+        return {
+            'cycles': cycles,
+            'alerts': self.alerts.profile_snapshot(),
+            'delivery': self.outbox.metrics(),
+            'dashboard': self.dashboard.stats if self.dashboard else None,
+        }
     
     def stop(self):
         self.running = False
+        self.outbox.stop()
         print("🛑 Monitor stopped")
@@ -0,0 +1,127 @@
+# trade_views.py
+from typing import Dict, List, Optional, Tuple
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from database import TradeDatabase, Trade
+
+HISTORY_PAGE_SIZE = 5
+
+
+class TradeViews:
+    """Cached /status and /history replies
+
+    Views are per tenant (owner chat). Each is reused until the owner's
+    version in TradeDatabase changes; when it does, only the rows of trades
+    whose state changed are re-rendered.
+    """
+
+    def __init__(self, db: TradeDatabase, page_size: int = HISTORY_PAGE_SIZE):
+        self.db = db
+        self.page_size = page_size
+        # trade id -> (state key, rendered row)
+        self.status_rows: Dict[str, Tuple[tuple, str]] = {}
+        self.history_rows: Dict[str, Tuple[tuple, str]] = {}
+        # owner -> (version, text)
+        self.status_cache: Dict[str, Tuple[int, Optional[str]]] = {}
+        # owner -> (version, closed trades, positions)
+        self.closed_cache: Dict[str, Tuple[int, List[Trade], Dict[str, int]]] = {}
+        # (owner, cursor) -> (text, keyboard); cleared with the owner's closed_cache
+        self.page_cache: Dict[tuple, Tuple[str, Optional[InlineKeyboardMarkup]]] = {}
+
+    @staticmethod
+    def _row(trade: Trade, render, rows: Dict[str, Tuple[tuple, str]]) -> str:
+        key = trade.state_key()
+        cached = rows.get(trade.id)
+        if cached and cached[0] == key:
+            return cached[1]
+        row = render(trade)
+        rows[trade.id] = (key, row)
+        return row
+
+    # ============ STATUS ============
+
+    def status(self, owner: str) -> Optional[str]:
+        """Active trades listing of one tenant, or None when there are none"""
+        owner = str(owner)
+        version = self.db.owner_version(owner)
+        cached = self.status_cache.get(owner)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        active = self.db.get_active(owner)
+        text = None
+        if active:
+            text = "📊 <b>অ্যাক্টিভ ট্রেডস:</b>\n\n" + "".join(self._row(t, self._status_row, self.status_rows) for t in active)
+        self.status_cache[owner] = (version, text)
+        return text
+
+    @staticmethod
+    def _status_row(t: Trade) -> str:
+        emoji = "🟢" if t.direction == "LONG" else "🔴"
+        tp_status = "🥉 TP3" if t.tp3_hit else "🥈 TP2" if t.tp2_hit else "🥇 TP1" if t.tp1_hit else "⏳ পেন্ডিং"
+        next_tp = f"${t.current_tp:.4f}" if t.current_tp else "ডন"
+
+        row = f"{emoji} <b>{t.pair}</b> | {tp_status}\n"
+        row += f"   এন্ট্রি: ${t.entry_avg:.4f}\n"
+        row += f"   SL: ${t.current_sl:.4f}\n"
+        row += f"   Next TP: {next_tp}\n\n"
+        return row
+
+    # ============ HISTORY ============
+
+    def _closed(self, owner: str) -> Tuple[List[Trade], Dict[str, int]]:
+        """Closed trades of one tenant newest first, with each id's position"""
+        version = self.db.owner_version(owner)
+        cached = self.closed_cache.get(owner)
+        if not cached or cached[0] != version:
+            closed = list(reversed(self.db.get_closed(owner)))
+            cached = (version, closed, {t.id: i for i, t in enumerate(closed)})
+            self.closed_cache[owner] = cached
+            for key in [k for k in self.page_cache if k[0] == owner]:
+                del self.page_cache[key]
+        return cached[1], cached[2]
+
+    def history(self, owner: str, cursor: Optional[str] = None) -> Tuple[Optional[str], Optional[InlineKeyboardMarkup]]:
+        """One page of closed trades starting at trade id `cursor` (newest page by default)"""
+        owner = str(owner)
+        closed, positions = self._closed(owner)
+        if not closed:
+            return None, None
+
+        # An unknown cursor (e.g. a stale button) falls back to the newest page
+        if cursor not in positions:
+            cursor = None
+        if (owner, cursor) in self.page_cache:
+            return self.page_cache[(owner, cursor)]
+
+        start = positions[cursor] if cursor else 0
+        page = closed[start:start + self.page_size]
+        pages = (len(closed) + self.page_size - 1) // self.page_size
+        # Pages are anchored on trade ids, so round up when newer trades shifted them
+        number = (start + self.page_size - 1) // self.page_size + 1
+
+        text = f"📜 <b>ক্লোজড ট্রেডস:</b> ({number}/{pages})\n\n"
+        text += "".join(self._row(t, self._history_row, self.history_rows) for t in page)
+
+        buttons = []
+        if start > 0:
+            newer = closed[max(start - self.page_size, 0)]
+            buttons.append(InlineKeyboardButton("◀️ নতুন", callback_data=f"hist:{newer.id}"))
+        if start + self.page_size < len(closed):
+            older = closed[start + self.page_size]
+            buttons.append(InlineKeyboardButton("পুরনো ▶️", callback_data=f"hist:{older.id}"))
+        keyboard = InlineKeyboardMarkup([buttons]) if buttons else None
+
+        self.page_cache[(owner, cursor)] = (text, keyboard)
+        return text, keyboard
+
+    @staticmethod
+    def _history_row(t: Trade) -> str:
+        emoji = "✅" if t.tp1_hit else "❌"
+        row = f"{emoji} {t.pair} ({t.direction})\n"
+        if t.tp1_hit:
+            row += f"   TP1: {t.tp1_closed_percent}%\n"
+        if t.tp2_hit:
+            row += f"   TP2: {t.tp2_closed_percent}%\n"
+        if t.tp3_hit:
+            row += f"   TP3: {t.tp3_closed_percent}%\n"
+        return row + "\n"